@@ -3,45 +3,205 @@ import subprocess
 import csv
 import re
 import glob
+import tempfile
+import hashlib
+import time
+import queue
+import select
+import signal
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from Parinomo import indent_cpp_code, LoopBlocks
-from cleanup_executables import clean_all
+from Parinomo import indent_cpp_code, LoopBlocks, TILE_TIMING_CPUS
+from cpp_lexer import loop_spans
+from cpu_affinity import available_cpus, parse_cpu_list, pinned_command
+from workspace import request_workspace
+import scheduler
+from run_statistics import relative_ci_width, summarize
+from disk_cache import DiskCache, FileCache, make_key
+from toolchain import compile_command, compiler_version, tool_version
 
+# CPUs the benchmark runs are pinned to, so concurrent serial and parallel analyses
+# do not disturb each other's timings. By default both stay off the CPUs reserved for
+# tile timing: the serial code gets the last remaining CPU and the parallel code the
+# others ("none" disables pinning).
+_HOST_CPUS = available_cpus()
+_ANALYSIS_CPUS = [cpu for cpu in _HOST_CPUS if cpu not in TILE_TIMING_CPUS]
+_DEFAULT_SERIAL_CPUS = str(_ANALYSIS_CPUS[-1]) if len(_ANALYSIS_CPUS) > 1 else "none"
+_DEFAULT_PARALLEL_CPUS = ",".join(str(cpu) for cpu in _ANALYSIS_CPUS[:-1]) if len(_ANALYSIS_CPUS) > 1 else "none"
+ANALYSIS_SERIAL_CPUS = parse_cpu_list(os.environ.get("SPECBOT_ANALYSIS_SERIAL_CPUS", _DEFAULT_SERIAL_CPUS))
+ANALYSIS_PARALLEL_CPUS = parse_cpu_list(os.environ.get("SPECBOT_ANALYSIS_PARALLEL_CPUS", _DEFAULT_PARALLEL_CPUS))
+# Upper bound on input files benchmarked at once by one get_Insights call
+INSIGHTS_MAX_JOBS = int(os.environ.get("SPECBOT_INSIGHTS_MAX_JOBS", len(_HOST_CPUS)))
+# Whether get_Insights runs the callgrind pass that produces instruction counts
+ANALYSIS_COUNT_INSTRUCTIONS = os.environ.get("SPECBOT_COUNT_INSTRUCTIONS", "1").lower() not in ("0", "false", "no")
+# Adaptive repetition: after discarding the warm-up runs, each input is run until the
+# 95% confidence interval of its elapsed time is within the target width of the mean
+# (e.g. 0.05 = +/-5%), the run cap is hit or the per-input time budget (seconds) runs out
+ANALYSIS_WARMUP_RUNS = int(os.environ.get("SPECBOT_ANALYSIS_WARMUP_RUNS", 1))
+ANALYSIS_MIN_RUNS = int(os.environ.get("SPECBOT_ANALYSIS_MIN_RUNS", 3))
+ANALYSIS_MAX_RUNS = int(os.environ.get("SPECBOT_ANALYSIS_MAX_RUNS", 30))
+ANALYSIS_TARGET_CI_WIDTH = float(os.environ.get("SPECBOT_ANALYSIS_TARGET_CI_WIDTH", 0.05))
+ANALYSIS_TIME_BUDGET = float(os.environ.get("SPECBOT_ANALYSIS_TIME_BUDGET", 10))
+# Seconds one native run may take before it is killed and its input reported as timed out;
+# the callgrind pass gets ANALYSIS_CALLGRIND_SLOWDOWN times as long
+ANALYSIS_RUN_TIMEOUT = float(os.environ.get("SPECBOT_ANALYSIS_RUN_TIMEOUT", 60))
+ANALYSIS_CALLGRIND_SLOWDOWN = 50
 
-def get_Insights(parallel, cpp_file, input_dir, num_runs=1):
+# Built executables, keyed by normalized source, compiler version and flags, so a
+# repeated analysis of the same code skips compilation
+BINARY_CACHE_DIR = os.environ.get("SPECBOT_BINARY_CACHE_DIR", os.path.join("Cache", "binaries"))
+BINARY_CACHE_MAX_BYTES = int(os.environ.get("SPECBOT_BINARY_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+binary_cache = FileCache(BINARY_CACHE_DIR, max_bytes=BINARY_CACHE_MAX_BYTES)
+
+
+# Suffixes of the spread columns that follow each metric column, and the key each
+# one gets in the nested "Statistics" of a result record
+_STAT_SUFFIXES = (("Median", "median"), ("Stddev", "stddev"), ("CI95 Low", "ci_low"), ("CI95 High", "ci_high"))
+
+
+def insights_record(row):
+    """
+    Turns one flat get_Insights row into its JSON result record.
+
+    The metric means stay top-level keys, as clients chart every top-level key;
+    the spread columns and the run count move under "Statistics".
+
+    Args:
+        row (dict): Column name to value, as in the get_Insights DataFrame
+
+    Returns:
+        dict: The record, with "Statistics": {"Runs": n, metric: {median, stddev, ci_low, ci_high}}
+    """
+    record = {}
+    statistics = {}
+    for column, value in row.items():
+        for suffix, key in _STAT_SUFFIXES:
+            if column.endswith(" " + suffix):
+                statistics.setdefault(column[:-len(suffix) - 1], {})[key] = value
+                break
+        else:
+            record[column] = value
+    if "Runs" in record:
+        statistics = {"Runs": record.pop("Runs"), **statistics}
+    record["Statistics"] = statistics
+    return record
+
+
+def insights_records(df):
+    """
+    Converts a get_Insights DataFrame into a list of JSON result records (see insights_record).
+    """
+    return [insights_record(row) for row in df.to_dict(orient='records')]
+
+
+def binary_cache_key(source, compile_flags, compiler="g++"):
+    """
+    Returns the binary cache key for source built with compile_flags.
+
+    The source is normalized (line endings, trailing whitespace, blank lines) so
+    edits that cannot change the build still hit the cache.
+    """
+    lines = [line.rstrip() for line in source.replace("\r\n", "\n").split("\n")]
+    normalized = "\n".join(line for line in lines if line)
+    return make_key("binary", compiler_version(compiler), " ".join(compile_flags), normalized)
+
+
+# Per-input result rows of get_Insights, keyed by build, input contents, toolchain
+# and measurement settings
+INSIGHTS_MEMO_DIR = os.environ.get("SPECBOT_INSIGHTS_MEMO_DIR", os.path.join("Cache", "insights"))
+INSIGHTS_MEMO_TTL = float(os.environ.get("SPECBOT_INSIGHTS_MEMO_TTL", 7 * 24 * 3600))
+INSIGHTS_MEMO_MAX_ENTRIES = int(os.environ.get("SPECBOT_INSIGHTS_MEMO_MAX_ENTRIES", 4096))
+insights_memo = DiskCache(INSIGHTS_MEMO_DIR, ttl=INSIGHTS_MEMO_TTL, max_entries=INSIGHTS_MEMO_MAX_ENTRIES)
+
+# Content digests of input files, keyed by (path, mtime, size) so unchanged files are hashed once
+_input_digests = {}
+
+
+def input_file_digest(path):
+    """
+    Returns the SHA-256 of the contents of the input file at path.
+    """
+    stat = os.stat(path)
+    stamp = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    digest = _input_digests.get(stamp)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = _input_digests[stamp] = sha.hexdigest()
+    return digest
+
+
+def insights_row_key(build_key, input_path, num_runs, measure_instructions, cpus):
+    """
+    Returns the memo key of the get_Insights row for one input file.
+
+    Editing the input file changes its digest and therefore the key, so stale
+    rows are never returned.
+    """
+    return make_key("insights-row", build_key, input_file_digest(input_path), tool_version("valgrind"),
+                    num_runs, bool(measure_instructions), sorted(cpus or ()))
+
+
+def get_Insights(parallel, cpp_file, input_dir, num_runs=None, workspace=None, cpus=None, measure_instructions=None,
+                 force_rerun=False, progress=None):
+    """
+    Compiles cpp_file and benchmarks it on every .txt input in input_dir.
+
+    Timing and resource metrics come from native runs of the binary (rusage via
+    wait4); instruction counts come from an optional second pass under callgrind.
+    Each metric column holds the mean over the measured runs and is followed by
+    its median, standard deviation and 95% confidence interval columns
+    (insights_records nests those under "Statistics" for JSON clients). Rows are
+    memoized per input file, so unchanged inputs of an unchanged build come
+    straight from insights_memo.
+
+    Args:
+        parallel: Truthy to compile with OpenMP
+        cpp_file (str): Path of the C++ source
+        input_dir (str): Directory of input files fed to the program on stdin
+        num_runs (int): Runs measured per input file after the warm-up
+                        (None = repeat adaptively until the elapsed time is stable)
+        workspace (str): Request work directory for the executable and result CSV;
+                         without one, uniquely named files in executables/ and Results/ are used
+        cpus (set): CPU ids the benchmark runs are pinned to (None or empty = no pinning)
+        measure_instructions (bool): Run the callgrind pass for I refs
+                                     (default: ANALYSIS_COUNT_INSTRUCTIONS)
+        force_rerun (bool): Measure every input again instead of reusing memoized rows
+        progress (callable): Called as progress(input_file, status, row=None) as each
+                             input is queued, measured and finished
+
+    Returns:
+        DataFrame: One row of metrics per input file
+    """
     Files = []
     # print(f"Getting Insights for {input_dir} with {num_runs} runs per file")
+    if measure_instructions is None:
+        measure_instructions = ANALYSIS_COUNT_INSTRUCTIONS
     
-    # Create executables directory if it doesn't exist
-    if not os.path.exists("executables"):
-        os.makedirs("executables")
-        print("Created 'executables' directory for output files")
-    
-    # Place executable in the dedicated folder
-    executable = "./executables/output_file"
-    
-    if not os.path.exists("Results"):
-        os.makedirs("Results")
-    if parallel == False:
-        output_csv = "Results/ResultsSerial.csv"
+    if workspace is not None:
+        # Everything this request produces stays inside its own workspace
+        executable = os.path.join(workspace, "output_file")
+        output_dir = workspace
     else:
-        output_csv = "Results/ResultsParallel.csv"
-    
-    # Compile C++ Code
+        # Create executables directory if it doesn't exist
+        os.makedirs("executables", exist_ok=True)
+        # Unique executable name so concurrent callers do not overwrite each other
+        fd, executable = tempfile.mkstemp(prefix="output_file_", dir="executables")
+        os.close(fd)
+        output_dir = "Results"
+        os.makedirs(output_dir, exist_ok=True)
+
     if parallel == False:
-        compile_command = f"g++ {cpp_file} -o {executable} -O2"
+        output_csv = os.path.join(output_dir, "ResultsSerial.csv")
     else:
-        compile_command = f"g++ {cpp_file} -o {executable} -O2 -fopenmp"
+        output_csv = os.path.join(output_dir, "ResultsParallel.csv")
     
-    compilation = subprocess.run(compile_command, shell=True, capture_output=True, text=True)
-    if compilation.returncode != 0:
-        print("Compilation failed:", compilation.stderr)
-        # Clean up executable file if compilation failed
-        if os.path.exists(executable):
-            os.remove(executable)
-        exit(1)
-    else:
-        print(f"Compilation successful. Executable created at: {executable}")
+    compile_flags = ["-O2"] if parallel == False else ["-O2", "-fopenmp"]
+    with open(cpp_file, "r") as file:
+        source = file.read()
+    build_key = binary_cache_key(source, compile_flags)
     
     # CSV Headers
     csv_header = [
@@ -59,6 +219,9 @@ def get_Insights(parallel, cpp_file, input_dir, num_runs=1):
         "File System Inputs", 
         "File System Outputs"
     ]
+    stat_columns = [f"{metric} {stat}" for metric in csv_header[1:]
+                    for stat in ("Median", "Stddev", "CI95 Low", "CI95 High")]
+    columns = csv_header + stat_columns + ["Runs"]
     
     results = []
     
@@ -66,12 +229,13 @@ def get_Insights(parallel, cpp_file, input_dir, num_runs=1):
     if not os.path.exists(input_dir):
         print(f"Warning: Input directory '{input_dir}' does not exist. Creating empty results.")
         # Return empty DataFrame with proper structure
-        empty_df = pd.DataFrame(columns=csv_header)
+        empty_df = pd.DataFrame(columns=columns)
         empty_df.to_csv(output_csv, index=False)
         return empty_df
     
     # Process each input file
     file_being_parsed = 0
+    jobs = []
     for file in sorted(os.listdir(input_dir)):
 
         # Skip non-txt files
@@ -93,97 +257,122 @@ def get_Insights(parallel, cpp_file, input_dir, num_runs=1):
             File_name = file_being_parsed + 1
         
         file_being_parsed += 1
-        input_path = os.path.join(input_dir, file)
         Files.append(file)
-        print(f"Processing file: {file} ({num_runs} runs)")
-        
-        # Initialize storage for multiple runs
-        run_metrics = {
-            "Instruction References (I refs)": [],
-            "User Time (s)": [],
-            "System Time (s)": [],
-            "CPU Usage (%)": [],
-            "Elapsed Time (s)": [],
-            "Max RSS (KB)": [],
-            "Major Page Faults": [],
-            "Minor Page Faults": [],
-            "Voluntary Context Switches": [],
-            "Involuntary Context Switches": [],
-            "File System Inputs": [],
-            "File System Outputs": []
-        }
-        
-        # Run multiple times
-        for run in range(num_runs):
-            print(f"  Run {run+1}/{num_runs}")
-            command = f"/usr/bin/time -v valgrind --tool=callgrind {executable} < '{input_path}'"
-            
-            process = subprocess.run(command, shell=True, capture_output=True, text=True)
-            stdout, stderr = process.stdout, process.stderr
-            
-            # Extract Callgrind instructions (I refs)
-            instruction_refs = re.search(r"I\s+refs:\s+([\d,]+)", stdout)
-            run_metrics["Instruction References (I refs)"].append(
-                int(instruction_refs.group(1).replace(",", "")) if instruction_refs else 0
-            )
-            
-            # Extract time and memory stats from stderr
-            metric_patterns = {
-                "User Time (s)": r"User time \(seconds\):\s+([\d.]+)",
-                "System Time (s)": r"System time \(seconds\):\s+([\d.]+)",
-                "CPU Usage (%)": r"Percent of CPU this job got:\s+([\d]+)%",
-                "Elapsed Time (s)": r"Elapsed \(wall clock\) time.*?:\s+([\d:.]+)",
-                "Max RSS (KB)": r"Maximum resident set size \(kbytes\):\s+(\d+)",
-                "Major Page Faults": r"Major \(requiring I/O\) page faults:\s+(\d+)",
-                "Minor Page Faults": r"Minor \(reclaiming a frame\) page faults:\s+(\d+)",
-                "Voluntary Context Switches": r"Voluntary context switches:\s+(\d+)",
-                "Involuntary Context Switches": r"Involuntary context switches:\s+(\d+)",
-                "File System Inputs": r"File system inputs:\s+(\d+)",
-                "File System Outputs": r"File system outputs:\s+(\d+)"
-            }
-            
-            for metric, pattern in metric_patterns.items():
-                match = re.search(pattern, stderr)
-                if match:
-                    # Convert time format (mm:ss.ms) to seconds if needed
-                    if metric == "Elapsed Time (s)" and ":" in match.group(1):
-                        time_parts = match.group(1).split(':')
-                        if len(time_parts) == 2:  # mm:ss
-                            value = float(time_parts[0]) * 60 + float(time_parts[1])
-                        elif len(time_parts) == 3:  # hh:mm:ss
-                            value = float(time_parts[0]) * 3600 + float(time_parts[1]) * 60 + float(time_parts[2])
-                        else:
-                            value = float(match.group(1))
-                        # if parallel == 1 and file_being_parsed > 5 :
-                        #     value *= 0.5
-                    else:
-                        value = float(match.group(1))
-                        # if parallel == 1 and file_being_parsed > 5 :
-                        #     value *= 0.5
-                    run_metrics[metric].append(value)
-                else:
-                    run_metrics[metric].append(0)
-            
-        
-        # changing file name key to File_name 
-        run_metrics["Input File"] = File_name
-        
-        # Calculate averages
+        jobs.append((file, os.path.join(input_dir, file)))
+
+    # Reuse the rows of inputs already measured with the same build, toolchain and settings;
+    # only the remaining inputs are compiled for and run
+    row_keys = [insights_row_key(build_key, input_path, num_runs, measure_instructions, cpus) for _, input_path in jobs]
+    cached_rows = [None if force_rerun else insights_memo.get(key) for key in row_keys]
+    cached_rows = [row if isinstance(row, list) and len(row) == len(columns) else None for row in cached_rows]
+    pending = [job for job, row in zip(jobs, cached_rows) if row is None]
+    if len(pending) < len(jobs):
+        print(f"Reusing memoized results for {len(jobs) - len(pending)} of {len(jobs)} input files")
+    if progress:
+        for (file, _), row in zip(jobs, cached_rows):
+            if row is None:
+                progress(file, "queued")
+            else:
+                progress(file, "done", insights_record(dict(zip(columns, [file] + row[1:]))))
+
+    if pending:
+        # Compile C++ Code, reusing a cached build of the same source, compiler and flags
+        if binary_cache.fetch(build_key, executable):
+            print(f"Reusing cached build. Executable created at: {executable}")
+        else:
+            with scheduler.compile_slot():
+                command, env = compile_command(cpp_file, executable, compile_flags, source)
+                compilation = subprocess.run(command, capture_output=True, text=True, env=env)
+            if compilation.returncode != 0:
+                print("Compilation failed:", compilation.stderr)
+                # Clean up executable file if compilation failed
+                if os.path.exists(executable):
+                    os.remove(executable)
+                raise RuntimeError(f"Compilation failed: {compilation.stderr}")
+            else:
+                print(f"Compilation successful. Executable created at: {executable}")
+                binary_cache.store(build_key, executable)
+
+    # Pass 1 - wall clock: run the binary natively, one input at a time on the analysis
+    # CPUs, and read timing, RSS and the other counters from the kernel's rusage
+    all_metrics = []
+    timed_out_files = set()
+    for file, input_path in pending:
+        print(f"Processing file: {file} ({num_runs if num_runs is not None else 'adaptive'} runs)")
+        if progress:
+            progress(file, "timing")
+        run_metrics = {metric: [] for metric in csv_header[1:]}
+        with scheduler.run_slot():
+            runs, timed_out = _repeat_native(executable, input_path, cpus, workspace, num_runs)
+        for run in runs:
+            for metric, value in run.items():
+                run_metrics[metric].append(value)
+        all_metrics.append(run_metrics)
+        if timed_out:
+            timed_out_files.add(file)
+        if progress:
+            progress(file, "timed out" if timed_out else "timed")
+
+    # Pass 2 - instruction counts (optional): callgrind counts are deterministic, so the
+    # input files fan out across the analysis CPUs, each job pinned to a CPU of its own.
+    # Without CPUs to pin to, the runs stay serialized.
+    if measure_instructions and pending:
+        job_cpus = sorted(cpus) if cpus else []
+        free_cpus = queue.Queue()
+        for cpu in job_cpus:
+            free_cpus.put(cpu)
+
+        def run_job(job):
+            file, input_path = job
+            if file in timed_out_files:
+                return 0  # would only run into the (longer) callgrind timeout as well
+            cpu = free_cpus.get() if job_cpus else None
+            try:
+                if progress:
+                    progress(file, "counting instructions")
+                with scheduler.run_slot():
+                    return _count_instructions(executable, input_path, {cpu} if cpu is not None else None, workspace)
+            finally:
+                if cpu is not None:
+                    free_cpus.put(cpu)
+
+        workers = max(1, min(len(job_cpus), INSIGHTS_MAX_JOBS, len(pending))) if job_cpus else 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for run_metrics, instruction_refs in zip(all_metrics, pool.map(run_job, pending)):
+                run_metrics["Instruction References (I refs)"].append(instruction_refs)
+
+    measured_rows = {}
+    for (file, _), run_metrics in zip(pending, all_metrics):
+        # Summarize the runs: the metric columns keep the mean, and the median,
+        # stddev and 95% confidence interval go in the columns after them
         avg_results = [file]
+        spread = []
         for metric in csv_header[1:]:  # Skip "Input File"
-            metric_values = run_metrics[metric]
-            avg_value = sum(metric_values) / len(metric_values) if metric_values else 0
+            summary = summarize(run_metrics[metric])
             
             # Format averages properly
             if metric == "Instruction References (I refs)" or "Context Switches" in metric or "Faults" in metric or "Inputs" in metric or "Outputs" in metric or "RSS" in metric:
-                avg_results.append(int(avg_value))
+                avg_results.append(int(summary["mean"]))
             else:
-                avg_results.append(round(avg_value, 2))
+                avg_results.append(round(summary["mean"], 6))
+            spread += [round(summary[key], 6) for key in ("median", "stddev", "ci_low", "ci_high")]
             
         # Add to results
-        results.append(avg_results)
-        print(f"Completed processing {file} (averaged over {num_runs} runs)")
+        measured_runs = len(run_metrics["Elapsed Time (s)"])
+        measured_rows[file] = avg_results + spread + [measured_runs]
+        if progress:
+            progress(file, "done", insights_record(dict(zip(columns, measured_rows[file]))))
+        print(f"Completed processing {file} (averaged over {measured_runs} runs)")
     
+    for (file, _), key, row in zip(jobs, row_keys, cached_rows):
+        if row is None:
+            row = measured_rows[file]
+            # A timed-out run says nothing about the program's normal cost, so it is not memoized
+            if file not in timed_out_files:
+                insights_memo.set(key, row)
+        # The key covers the contents, not the name, so the row takes this file's name
+        results.append([file] + row[1:])
+
     # Clean up executable after all runs
     try:
         if os.path.exists(executable):
@@ -193,68 +382,199 @@ def get_Insights(parallel, cpp_file, input_dir, num_runs=1):
         print(f"Warning: Could not clean up executable {executable}: {e}")
     
     # Write results to CSV
-    df = pd.DataFrame(results, columns=csv_header)
+    df = pd.DataFrame(results, columns=columns)
     df.to_csv(output_csv, index=False)
     print(f"Results saved to {output_csv}")
     
     return df
 
+def _run_native(executable, input_path, cpus, workspace, timeout=None):
+    """
+    Runs executable natively on one input file and measures it with wait4 rusage.
+
+    The program runs in its own process group, which is killed once it has run
+    for timeout seconds (default: ANALYSIS_RUN_TIMEOUT).
+
+    Returns:
+        tuple: (metrics, timed_out) - the value of every timing/resource metric for
+               this run, and whether it was killed at the timeout
+    """
+    timeout = ANALYSIS_RUN_TIMEOUT if timeout is None else timeout
+    with open(input_path, "rb") as stdin:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            pinned_command([os.path.abspath(executable)], cpus),
+            stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=workspace,
+            start_new_session=True
+        )
+        # The pidfd becomes readable when the program exits; it is only reaped by
+        # wait4 below, so the kill can never hit a reused pid
+        pidfd = os.pidfd_open(process.pid)
+        try:
+            exited, _, _ = select.select([pidfd], [], [], timeout)
+        finally:
+            os.close(pidfd)
+        elapsed = time.perf_counter() - start
+        timed_out = not exited
+        if timed_out:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        _, status, usage = os.wait4(process.pid, 0)
+    # wait4 reaped the child, so record its exit status on the Popen object ourselves
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if timed_out:
+        print(f"Warning: {os.path.basename(input_path)} timed out after {timeout:g} s and was killed")
+    elif process.returncode != 0:
+        print(f"Warning: {os.path.basename(input_path)} exited with status {process.returncode}")
+
+    cpu_time = usage.ru_utime + usage.ru_stime
+    return {
+        "User Time (s)": usage.ru_utime,
+        "System Time (s)": usage.ru_stime,
+        "CPU Usage (%)": 100.0 * cpu_time / elapsed if elapsed > 0 else 0,
+        "Elapsed Time (s)": elapsed,
+        "Max RSS (KB)": usage.ru_maxrss,  # kilobytes on Linux
+        "Major Page Faults": usage.ru_majflt,
+        "Minor Page Faults": usage.ru_minflt,
+        "Voluntary Context Switches": usage.ru_nvcsw,
+        "Involuntary Context Switches": usage.ru_nivcsw,
+        "File System Inputs": usage.ru_inblock,
+        "File System Outputs": usage.ru_oublock,
+    }, timed_out
+
+def _repeat_native(executable, input_path, cpus, workspace, num_runs):
+    """
+    Runs executable natively on one input file until enough runs are measured.
+
+    Warm-up runs are discarded first. With num_runs set, exactly that many runs
+    are measured; otherwise runs are repeated until the 95% confidence interval
+    of the elapsed time is within ANALYSIS_TARGET_CI_WIDTH of the mean, or
+    ANALYSIS_MAX_RUNS or the ANALYSIS_TIME_BUDGET is reached. A run that times
+    out ends the repetition; it is kept as the only measured run.
+
+    Returns:
+        tuple: (runs, timed_out) - metrics of every measured run, and whether a run timed out
+    """
+    deadline = time.perf_counter() + ANALYSIS_TIME_BUDGET
+    for _ in range(ANALYSIS_WARMUP_RUNS):
+        run, timed_out = _run_native(executable, input_path, cpus, workspace)
+        if timed_out:
+            return [run], True
+
+    runs = []
+    while True:
+        run, timed_out = _run_native(executable, input_path, cpus, workspace)
+        if timed_out:
+            return [run], True
+        runs.append(run)
+        if num_runs is not None:
+            if len(runs) >= num_runs:
+                break
+            continue
+        if len(runs) >= ANALYSIS_MAX_RUNS or time.perf_counter() >= deadline:
+            break
+        if len(runs) >= ANALYSIS_MIN_RUNS and relative_ci_width([run["Elapsed Time (s)"] for run in runs]) <= ANALYSIS_TARGET_CI_WIDTH:
+            break
+    print(f"  {len(runs)} measured runs (elapsed CI ±{relative_ci_width([run['Elapsed Time (s)'] for run in runs]):.1%})")
+    return runs, False
+
+def _count_instructions(executable, input_path, cpus, workspace):
+    """
+    Runs executable on one input file under callgrind and returns its I refs (0 if unavailable).
+    """
+    # Run inside the workspace so callgrind.out.* files are cleaned up with it
+    command = pinned_command(["valgrind", "--tool=callgrind", os.path.abspath(executable)], cpus)
+    try:
+        with open(input_path, "rb") as stdin:
+            process = subprocess.run(command, stdin=stdin, capture_output=True, cwd=workspace,
+                                     timeout=ANALYSIS_RUN_TIMEOUT * ANALYSIS_CALLGRIND_SLOWDOWN)
+    except subprocess.TimeoutExpired:
+        print(f"Warning: callgrind timed out on {os.path.basename(input_path)}")
+        return 0
+    except OSError as e:
+        print(f"Warning: Could not run callgrind: {e}")
+        return 0
+    # valgrind writes its summary to stderr
+    output = process.stderr.decode(errors="replace") + process.stdout.decode(errors="replace")
+    instruction_refs = re.search(r"I\s+refs:\s+([\d,]+)", output)
+    return int(instruction_refs.group(1).replace(",", "")) if instruction_refs else 0
+
+# Input kinds by the cin statement that reads them inside a loop, most specific first
+_NAME = r'[a-zA-Z_][a-zA-Z0-9_]*'
+_SUBSCRIPT = r'\s*\[\s*[a-zA-Z0-9_]+\s*\]'
+INPUT_PATTERNS = (
+    ("2 D Array", re.compile(rf'\bcin\s*>>\s*{_NAME}{_SUBSCRIPT}{_SUBSCRIPT}')),
+    ("1 D Array", re.compile(rf'\bcin\s*>>\s*{_NAME}{_SUBSCRIPT}(?!\s*\[)')),
+    ("Weighted Graph", re.compile(rf'\bcin\s*>>\s*{_NAME}\s*>>\s*{_NAME}\s*>>\s*{_NAME}\s*;')),
+    ("Graph", re.compile(rf'\bcin\s*>>\s*{_NAME}\s*>>\s*{_NAME}\s*;')),
+)
+
+def detect_input_types(code):
+    """
+    Ranks the input kinds the code reads inside its loops.
+
+    Args:
+        code (str): C++ source code
+
+    Returns:
+        list: Input kinds ("2 D Array", "1 D Array", "Weighted Graph", "Graph"),
+              ordered by the first loop reading each one and, within a loop, most
+              specific first; empty if no loop reads a known kind
+    """
+    ranked = []
+    for start, end in loop_spans(code, any_loop=True):
+        for kind, pattern in INPUT_PATTERNS:
+            if kind not in ranked and pattern.search(code, start, end):
+                ranked.append(kind)
+    return ranked
+
 def detect_input_type(code):
-    # Regex patterns for loop structures
-    loop_pattern = re.compile(r'\b(for|while|do)\b[^{]*{')
-    
-    # Regex patterns for input types
-    one_d_array = re.compile(r'\bcin\s*>>\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\[\s*[a-zA-Z0-9_]+\s*\]')
-    two_d_array = re.compile(r'\bcin\s*>>\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\[\s*[a-zA-Z0-9_]+\s*\]\s*\[\s*[a-zA-Z0-9_]+\s*\]')
-    graph = re.compile(r'\bcin\s*>>\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*>>\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*;')
-    weighted_graph = re.compile(r'\bcin\s*>>\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*>>\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*>>\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*;')
-    
-    # Find all loops
-    loop_blocks = loop_pattern.findall(code)
-    
-    # Checking inside loop bodies
-    for match in re.finditer(loop_pattern, code):
-        loop_body_start = match.end()
-        loop_body = code[loop_body_start:]
-        
-        # Find first closing brace to extract only loop content
-        brace_count = 1
-        for i, char in enumerate(loop_body):
-            if char == '{':
-                brace_count += 1
-            elif char == '}':
-                brace_count -= 1
-                if brace_count == 0:
-                    loop_body = loop_body[:i]
-                    break
-        
-        # Check input type 
-        if re.search(two_d_array, loop_body):
-            return "2 D Array"
-        elif re.search(one_d_array, loop_body):
-            return "1 D Array"
-        elif re.search(weighted_graph, loop_body):
-            return "Weighted Graph"
-        elif re.search(graph, loop_body):
-            return "Graph"
-    
-    return "Unknown"
+    """
+    Returns the most likely input kind of the code (see detect_input_types), or "Unknown".
+    """
+    ranked = detect_input_types(code)
+    return ranked[0] if ranked else "Unknown"
+
+def Calling_for_analysis(Code,Type,cpus=None,measure_instructions=None,num_runs=None,force_rerun=False,progress=None):
+    """
+    Formats Code and benchmarks it on the inputs matching its input type.
+    All artifacts live in a per-request workspace that is removed afterwards,
+    so several analyses can run at the same time.
 
-def Calling_for_analysis(Code,Type):
+    Args:
+        Code (str): C++ source to analyze
+        Type: 1 for the parallel (OpenMP) code, 0 for the serial code
+        cpus (set): CPUs to pin the benchmark runs to (default: ANALYSIS_PARALLEL_CPUS
+                    or ANALYSIS_SERIAL_CPUS depending on Type)
+        measure_instructions (bool): Also count instructions under callgrind
+                                     (default: ANALYSIS_COUNT_INSTRUCTIONS)
+        num_runs (int): Runs measured per input (None = adaptive repetition)
+        force_rerun (bool): Ignore memoized results and measure every input again
+        progress (callable): Per-input progress callback, see get_Insights
+    """
+    if cpus is None:
+        cpus = ANALYSIS_PARALLEL_CPUS if Type else ANALYSIS_SERIAL_CPUS
+    with request_workspace("analysis-") as workspace:
+        return _analyze_in_workspace(Code, Type, workspace, cpus, measure_instructions, num_runs, force_rerun, progress)
+
+def _analyze_in_workspace(Code, Type, workspace, cpus, measure_instructions, num_runs, force_rerun, progress):
 
     # print("Indent Code")
     Code = indent_cpp_code(Code)
    
     # saving the Code string in a cpp file
-    with open("Code.cpp", "w") as file:
+    cpp_file = os.path.join(workspace, "Code.cpp")
+    with open(cpp_file, "w") as file:
         file.write(Code)
 
     # print("Splitting")
     Loops = LoopBlocks(Code)
 
-    # finding the input type where will be cin statements
-    Loop_found = ''
-    Loop_found = detect_input_type(Code)
+    # finding the input types read by cin statements, most likely first
+    Input_types = detect_input_types(Code)
+    Loop_found = Input_types[0] if Input_types else "Unknown"
     
     print("Input type = ", Loop_found)
     
@@ -263,7 +583,9 @@ def Calling_for_analysis(Code,Type):
     if not os.path.exists(input_path):
         print(f"Warning: Input directory '{input_path}' does not exist.")
         # Create a default input directory or use a fallback
-        fallback_dirs = ["Inputs/1 D Array", "Inputs/2 D Array", "Inputs/Graph", "Inputs/Weighted Graph"]
+        # Other detected input types are tried before the default ones
+        fallback_dirs = ["Inputs/" + kind for kind in Input_types[1:]]
+        fallback_dirs += ["Inputs/1 D Array", "Inputs/2 D Array", "Inputs/Graph", "Inputs/Weighted Graph"]
         input_path = None
         for fallback in fallback_dirs:
             if os.path.exists(fallback):
@@ -280,12 +602,11 @@ def Calling_for_analysis(Code,Type):
 
     # getting the insights
     try:
-        df = get_Insights(Type, "Code.cpp", input_path)
+        df = get_Insights(Type, cpp_file, input_path, num_runs=num_runs, workspace=workspace, cpus=cpus,
+                          measure_instructions=measure_instructions, force_rerun=force_rerun, progress=progress)
     except Exception as e:
         print(f"Error in get_Insights: {e}")
         # Return empty DataFrame on error
         df = pd.DataFrame()
 
-    clean_all()
-
     return df
\ No newline at end of file
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the Parinomo analysis pipeline, with regression tracking.
+
+Each stage of Parinomo() (loop extraction, complexity, dependency analysis,
+OpenMP clause inference, tiling and formatting) and the whole pipeline are
+timed on synthetic C++ files of 10 to 1,000 loops (10,000 with --large). The empirical tile search
+is answered by a deterministic fake runner, so nothing is compiled or run and
+the timings only cover the analysis itself.
+
+Results are compared with a JSON baseline; the script exits with status 1 when
+a stage got slower than the baseline by more than the threshold, and with
+status 2 when there is no baseline to compare with.
+
+Usage (from Backend/):
+    python benchmarks/bench_parinomo.py --save-baseline # record a new baseline
+    python benchmarks/bench_parinomo.py                 # compare with the baseline
+    python benchmarks/bench_parinomo.py --large         # also time a 10,000-loop file
+    python benchmarks/bench_parinomo.py --sizes 10,100 --stages loop_blocks,tiling
+"""
+
+import argparse
+import atexit
+import contextlib
+import gc
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = (10, 100, 1000)
+# Added by --large; a full run at this size takes minutes
+LARGE_SIZE = 10000
+# Slowdown (relative to the baseline) above which a stage counts as a regression
+DEFAULT_THRESHOLD = 0.25
+# Slowdowns smaller than this many seconds are timer noise, whatever their ratio
+NOISE_FLOOR = 0.002
+# Loops per generated function, so the corpus looks like ordinary source files
+LOOPS_PER_FUNCTION = 25
+
+# Keep the benchmark's tile cache and P_code.txt out of the working tree
+_scratch = tempfile.mkdtemp(prefix="specbot-bench-")
+atexit.register(shutil.rmtree, _scratch, ignore_errors=True)
+os.environ["SPECBOT_TILE_CACHE_DIR"] = os.path.join(_scratch, "tile_search")
+sys.path.insert(0, BACKEND_DIR)
+
+import Parinomo  # noqa: E402
+from disk_cache import make_key  # noqa: E402
+from loop_ir import loop_ir  # noqa: E402
+from toolchain import cpu_signature  # noqa: E402
+
+# Loop templates of the corpus; {n} is a unique suffix, {N} the bound
+_TEMPLATES = (
+    # element-wise 1D
+    "for (int i = 0; i < {N}; i++) {{\n    c{n}[i] = a{n}[i] + b{n}[i] * s{n};\n}}",
+    # reduction
+    "for (int i = 0; i < {N}; i++) {{\n    sum{n} = sum{n} + a{n}[i];\n}}",
+    # 2D stencil-free update
+    "for (int i = 0; i < {N}; i++) {{\n    for (int j = 0; j < {N}; j++) {{\n"
+    "        c{n}[i][j] = a{n}[i][j] + b{n}[i][j];\n    }}\n}}",
+    # 3D matrix multiplication
+    "for (int i = 0; i < {N}; i++) {{\n    for (int j = 0; j < {N}; j++) {{\n        for (int k = 0; k < {N}; k++) {{\n"
+    "            c{n}[i][j] += a{n}[i][k] * b{n}[k][j];\n        }}\n    }}\n}}",
+    # loop-carried dependency
+    "for (int i = 1; i < {N}; i++) {{\n    a{n}[i] = a{n}[i - 1] + b{n}[i];\n}}",
+    # input
+    "for (int i = 0; i < {N}; i++) {{\n    cin >> a{n}[i];\n}}",
+    # private temporary
+    "for (int i = 0; i < {N}; i++) {{\n    t{n} = a{n}[i] * 2;\n    c{n}[i] = t{n} + b{n}[i];\n}}",
+    # early exit with break (parallelized through Soft_Break, not tiled)
+    "for (int i = 0; i < {N}; i++) {{\n    for (int j = 0; j < {N}; j++) {{\n"
+    "        if (a{n}[i][j] == key{n}) {{\n            found{n} = j;\n            break;\n        }}\n    }}\n}}",
+    # early exit with return
+    "for (int i = 0; i < {N}; i++) {{\n    for (int j = 0; j < {N}; j++) {{\n"
+    "        if (a{n}[i][j] == key{n}) {{\n            return i;\n        }}\n    }}\n}}",
+)
+
+
+def generate_corpus(loops, seed=0):
+    """
+    Generate a C++ source file with the given number of loops.
+
+    The same loops and seed always give the same file.
+
+    Args:
+        loops (int): Number of outermost loops
+        seed (int): Seed of the template and bound choices
+
+    Returns:
+        str: C++ source code
+    """
+    rng = random.Random(f"{seed}-{loops}")
+    functions = []
+    for first in range(0, loops, LOOPS_PER_FUNCTION):
+        bodies = []
+        for n in range(first, min(first + LOOPS_PER_FUNCTION, loops)):
+            template = rng.choice(_TEMPLATES)
+            bound = rng.choice(("n", "m", str(rng.choice((64, 100, 512, 1000)))))
+            bodies.append(template.format(n=n, N=bound))
+        functions.append(f"int kernel{first // LOOPS_PER_FUNCTION}(int n, int m) {{\n"
+                         + "\n".join(bodies) + "\nreturn -1;\n}")
+    return "#include <iostream>\nusing namespace std;\n\n" + "\n\n".join(functions) + "\n"
+
+
+def fake_tile_time(cpp_code, tile_size=None):
+    """
+    Deterministic stand-in for a harness timing, in microseconds.
+
+    The time is convex in log2(tile size) around an optimum derived from the
+    harness source, so the search strategies behave as on real timings.
+    """
+    digest = int(make_key(cpp_code)[:8], 16)
+    optimum = 2 ** (3 + digest % 7)
+    if tile_size is None:
+        return 1000.0 + digest % 1000
+    return 1000.0 + 100.0 * abs(math.log2(tile_size) - math.log2(optimum))
+
+
+@contextlib.contextmanager
+def fake_tile_runner():
+    """
+    Answer the empirical tile search with fake_tile_time instead of compiling harnesses.
+    """
+    originals = Parinomo.run_tile_sweep, Parinomo.run_performance_tests
+    Parinomo.run_tile_sweep = lambda cpp_code, tile_sizes, *args, **kwargs: [
+        fake_tile_time(cpp_code, tile_size) for tile_size in tile_sizes
+    ]
+    Parinomo.run_performance_tests = lambda cpp_codes, *args, **kwargs: [
+        fake_tile_time(cpp_code) for cpp_code in cpp_codes
+    ]
+    try:
+        yield
+    finally:
+        Parinomo.run_tile_sweep, Parinomo.run_performance_tests = originals
+
+
+def prepare(code):
+    """
+    Precompute the inputs the individual stages take from earlier stages.
+    """
+    loops = Parinomo.LoopBlocks(code)
+    classes = [Parinomo.Complexity_of_loop(loop)[0] for loop in loops]
+    array_types = [Parinomo.determine_array_access_type(loop) for loop in loops]
+    tiled = [Parinomo.generate_tiled_loop(loop, array_type, complexity, tile_size=64)
+             for loop, array_type, complexity in zip(loops, array_types, classes)
+             if array_type != "Single variables"]
+    return {"code": code, "loops": loops, "classes": classes, "array_types": array_types, "tiled": tiled}
+
+
+def _stage_loop_blocks(corpus):
+    Parinomo.LoopBlocks(corpus["code"])
+
+
+def _stage_complexity(corpus):
+    for loop in corpus["loops"]:
+        Parinomo.Complexity_of_loop(loop)
+
+
+def _stage_dependencies(corpus):
+    for loop in corpus["loops"]:
+        Parinomo.identify_dependencies(loop)
+
+
+def _stage_openmp(corpus):
+    for loop in corpus["loops"]:
+        single_variables, array_variables = Parinomo.extract_loop_variables(loop)
+        Parinomo.extract_variables_from_loop(loop)
+        Parinomo.analyze_openmp_variables(loop, single_variables, array_variables)
+        Parinomo.Reduction_aaplication(loop)
+
+
+def _stage_tiling(corpus):
+    for loop, array_type, complexity in zip(corpus["loops"], corpus["array_types"], corpus["classes"]):
+        Parinomo.tile_loop(Parinomo.normalize_loop(loop), array_type, complexity, indent=False,
+                           analysis_level="empirical")
+
+
+def _stage_formatting(corpus):
+    Parinomo.indent_cpp_code_batch(corpus["tiled"])
+
+
+def _stage_parinomo(corpus):
+    Parinomo.Parinomo(corpus["code"], "host", "8GB", 4, analysis_level="empirical")
+
+
+STAGES = {
+    "loop_blocks": _stage_loop_blocks,
+    "complexity": _stage_complexity,
+    "dependencies": _stage_dependencies,
+    "openmp": _stage_openmp,
+    "tiling": _stage_tiling,
+    "formatting": _stage_formatting,
+    "parinomo": _stage_parinomo,
+}
+
+
+def _reset_caches():
+    # Every repetition starts cold, as a request with new code would
+    loop_ir.cache_clear()
+    Parinomo.tile_cache.clear()
+    with Parinomo._format_memo_lock:
+        Parinomo._format_memo.clear()
+
+
+def time_stage(stage, corpus, repeats):
+    """
+    Return the best of repeats cold runs of a stage, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        _reset_caches()
+        # Like timeit, keep garbage collection pauses out of the measurement
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            stage(corpus)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def run_benchmarks(sizes, stages, repeats):
+    """
+    Time the stages on a corpus of each size.
+
+    Returns:
+        dict: Loop count (as a string) -> stage -> seconds
+    """
+    results = {}
+    working_directory = os.getcwd()
+    os.chdir(_scratch)
+    try:
+        with fake_tile_runner():
+            for size in sizes:
+                corpus = prepare(generate_corpus(size))
+                results[str(size)] = {}
+                for name in stages:
+                    # The pipeline reports its progress on stdout; keep the benchmark output readable
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        seconds = time_stage(STAGES[name], corpus, repeats)
+                    results[str(size)][name] = seconds
+                    print(f"⏱️  {size:>6} loops  {name:<13} {seconds * 1000:10.2f} ms")
+    finally:
+        os.chdir(working_directory)
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    Returns:
+        list: (size, stage, baseline seconds, seconds) of each stage slower than
+              the baseline by more than threshold (and the noise floor)
+    """
+    regressions = []
+    for size, stages in results.items():
+        for name, seconds in stages.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            if seconds > reference * (1 + threshold) and seconds - reference > NOISE_FLOOR:
+                regressions.append((size, name, reference, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Parinomo analysis pipeline and check for regressions",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("Usage", 1)[1],
+    )
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated loop counts of the synthetic corpus files")
+    parser.add_argument("--large", action="store_true", help=f"Also time a {LARGE_SIZE}-loop file")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"Comma-separated stages to time ({', '.join(STAGES)})")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per stage; the fastest counts")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown that counts as a regression (default: 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    if args.large and LARGE_SIZE not in sizes:
+        sizes.append(LARGE_SIZE)
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+
+    baseline = None
+    if not args.save_baseline:
+        # Checked before benchmarking, so a missing baseline fails fast
+        try:
+            with open(args.baseline, "r") as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"❌ No baseline to compare with ({e}); run with --save-baseline to record one")
+            return 2
+
+    report = {
+        "machine": cpu_signature(),
+        "python": sys.version.split()[0],
+        "repeats": args.repeats,
+        "results": run_benchmarks(sizes, stages, max(1, args.repeats)),
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=4)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline.get("machine") != report["machine"]:
+        print(f"⚠️  Baseline was recorded on {baseline.get('machine')}, timings may not be comparable")
+
+    regressions = find_regressions(report["results"], baseline.get("results", {}), args.threshold)
+    for size, name, reference, seconds in regressions:
+        print(f"❌ {name} on {size} loops: {reference * 1000:.2f} ms -> {seconds * 1000:.2f} ms "
+              f"(+{(seconds / reference - 1) * 100:.0f}%)")
+    if regressions:
+        return 1
+    print(f"✅ No stage slower than the baseline by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Cache topology of the host, read from Linux sysfs.
+
+The sizes, line sizes and associativity of every cache level come from
+/sys/devices/system/cpu/cpu*/cache/index*. They are read once per process;
+where sysfs is unavailable the typical desktop values are used instead.
+"""
+
+import functools
+import os
+
+from cpu_affinity import available_cpus, parse_cpu_list
+
+SYSFS_CPU_ROOT = "/sys/devices/system/cpu"
+
+# Used when the cache topology cannot be read
+DEFAULT_CACHE_HIERARCHY = {
+    'L1': 32 * 1024,       # 32KB L1 cache
+    'L2': 256 * 1024,      # 256KB L2 cache
+    'L3': 8 * 1024 * 1024, # 8MB L3 cache
+}
+DEFAULT_LINE_SIZE = 64
+
+_SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_cache_size(text):
+    """
+    Convert a sysfs cache size such as "48K" or "30M" to bytes.
+
+    Returns:
+        int: Size in bytes, or None if text is not a size.
+    """
+    text = str(text).strip().upper()
+    if not text:
+        return None
+    multiplier = _SIZE_UNITS.get(text[-1], 1)
+    digits = text[:-1] if text[-1] in _SIZE_UNITS else text
+    try:
+        return int(digits) * multiplier
+    except ValueError:
+        return None
+
+
+def _read(path):
+    try:
+        with open(path, "r") as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def read_cpu_caches(cpu=0, root=SYSFS_CPU_ROOT):
+    """
+    Read the caches visible to one CPU.
+
+    Args:
+        cpu (int): CPU id.
+        root (str): sysfs CPU directory (overridable for tests).
+
+    Returns:
+        list: One dict per cache with level, type, size, line_size, ways, sets
+        and shared_cpus, ordered by level; empty if sysfs is unavailable.
+    """
+    cache_dir = os.path.join(root, f"cpu{cpu}", "cache")
+    try:
+        names = sorted(name for name in os.listdir(cache_dir) if name.startswith("index"))
+    except OSError:
+        return []
+
+    caches = []
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        level = _read(os.path.join(path, "level"))
+        size = parse_cache_size(_read(os.path.join(path, "size")) or "")
+        if level is None or not level.isdigit() or size is None:
+            continue
+        line_size = _read(os.path.join(path, "coherency_line_size"))
+        ways = _read(os.path.join(path, "ways_of_associativity"))
+        sets = _read(os.path.join(path, "number_of_sets"))
+        caches.append({
+            "level": int(level),
+            "type": _read(os.path.join(path, "type")) or "Unknown",
+            "size": size,
+            "line_size": int(line_size) if line_size and line_size.isdigit() else None,
+            "ways": int(ways) if ways and ways.isdigit() else None,
+            "sets": int(sets) if sets and sets.isdigit() else None,
+            "shared_cpus": len(parse_cpu_list(_read(os.path.join(path, "shared_cpu_list")) or "")) or 1,
+        })
+    caches.sort(key=lambda cache: (cache["level"], cache["type"]))
+    return caches
+
+
+@functools.lru_cache(maxsize=None)
+def host_cache_topology():
+    """
+    Return the host's cache topology, read once per process.
+
+    Returns:
+        dict: 'caches' (see read_cpu_caches), 'hierarchy' mapping L1/L2/L3 to
+        the data (or unified) cache size in bytes, 'line_size' and 'source'
+        ("sysfs" or "default").
+    """
+    cpus = available_cpus()
+    caches = read_cpu_caches(cpus[0] if cpus else 0)
+
+    hierarchy = {}
+    for cache in caches:
+        if cache["type"] == "Instruction":
+            continue
+        hierarchy.setdefault(f"L{cache['level']}", cache["size"])
+    line_sizes = [cache["line_size"] for cache in caches if cache["line_size"]]
+
+    source = "sysfs" if hierarchy else "default"
+    # Levels missing from sysfs (e.g. no L3) fall back to the defaults
+    for level, size in DEFAULT_CACHE_HIERARCHY.items():
+        hierarchy.setdefault(level, size)
+
+    return {
+        "caches": caches,
+        "hierarchy": hierarchy,
+        "line_size": min(line_sizes) if line_sizes else DEFAULT_LINE_SIZE,
+        "source": source,
+    }
@@ -0,0 +1,183 @@
+"""
+Minimal C++ lexer for the loop analyses.
+
+tokenize scans a translation unit once, skipping whitespace and comments and
+keeping string and character literals and preprocessor directives as single
+tokens, so keywords inside them (or inside identifiers such as "format") are
+never mistaken for code. loop_spans locates for loops as (start, end) offsets
+into the original source in linear time, applying the same lexical rules but
+only stopping at the brackets, semicolons and keywords that delimit statements.
+"""
+
+import re
+from collections import namedtuple
+
+Token = namedtuple("Token", "kind text start end")
+
+_COMMENT = r"//[^\n]*|/\*.*?(?:\*/|\Z)"
+_DIRECTIVE = r"\#(?:[^\n\\]|\\.)*"
+_STRING = r"""(?:u8|[uUL])?R"(?P<delimiter>[^()\\\s"]{0,16})\(.*?\)(?P=delimiter)"|(?:u8|[uUL])?"(?:[^"\\\n]|\\.)*"?"""
+_CHAR = r"(?:u8|[uUL])?'(?:[^'\\\n]|\\.)*'?"
+_NUMBER = r"\.?\d(?:[eEpP][+-]|[\w.'])*"
+
+_TOKEN = re.compile(rf"""
+    (?P<space>\s+)
+  | (?P<comment>{_COMMENT})
+  | (?P<directive>{_DIRECTIVE})
+  | (?P<string>{_STRING})
+  | (?P<char>{_CHAR})
+  | (?P<number>{_NUMBER})
+  | (?P<identifier>[A-Za-z_]\w*)
+  | (?P<punct>->\*?|\+\+|--|<=>|<<=?|>>=?|[<>=!+\-*/%&|^]=|&&|\|\||::|\.\.\.|\.\*|.)
+""", re.VERBOSE | re.DOTALL)
+
+# Loop location: each scanner matches comments, directives and literals (so they are
+# skipped as a whole) and only the few marks its scan needs. The lookahead on the
+# first character lets the regex engine step over all other code quickly.
+_SEPARATED_NUMBER = r"\d[\w.]*'[\w.']*"
+_LITERAL = rf"{_COMMENT}|{_DIRECTIVE}|{_STRING}|{_CHAR}|{_SEPARATED_NUMBER}"
+
+
+def _scanner(first_characters, marks):
+    return re.compile(rf"""(?=[/#"'\duULR{first_characters}])(?:{_LITERAL}|(?P<mark>{marks}))""", re.DOTALL)
+
+
+_FOR_HEADER = _scanner("f", r"\bfor\s*\(")
+_ANY_LOOP_HEADER = _scanner("fwd", r"\b(?:for|while)\s*\(|\bdo\b")
+_PARENTHESES = _scanner("();", r"[();]")
+_BRACES = _scanner("{}", r"[{}]")
+_STATEMENT = _scanner("(){};fwsied", r"[(){};]|\b(?:for|while|switch|if)\s*\(|\b(?:else|do)\b")
+_SPACE = re.compile(rf"(?:\s+|{_COMMENT})*", re.DOTALL)
+_ELSE = re.compile(r"else\b")
+
+_SKIPPED = ("space", "comment")
+
+
+def tokenize(source):
+    """
+    Yield the tokens of source, without whitespace and comments.
+
+    Args:
+        source (str): C++ source code.
+
+    Yields:
+        Token: kind ("identifier", "number", "string", "char", "punct" or
+        "directive"), text, and start/end offsets into source.
+    """
+    for match in _TOKEN.finditer(source):
+        kind = match.lastgroup
+        if kind not in _SKIPPED:
+            yield Token(kind, match.group(), match.start(), match.end())
+
+
+def _marks(pattern, source, position):
+    # (mark, start, end) of the marks pattern finds from position on
+    for match in pattern.finditer(source, position):
+        mark = match.group("mark")
+        if mark is not None:
+            yield mark, match.start(), match.end()
+
+
+def _parenthesis_end(source, position):
+    """
+    Return (end, semicolons) for the parenthesized group opening at position.
+
+    end is the offset just past the matching ')' (len(source) if unmatched)
+    and semicolons counts the ';' inside the group.
+    """
+    depth = semicolons = 0
+    for mark, _, end in _marks(_PARENTHESES, source, position):
+        if mark == "(":
+            depth += 1
+        elif mark == ";":
+            semicolons += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return end, semicolons
+    return len(source), semicolons
+
+
+def _brace_end(source, position):
+    # Offset just past the '}' matching the '{' at position (len(source) if unmatched)
+    depth = 0
+    for mark, _, end in _marks(_BRACES, source, position):
+        depth += 1 if mark == "{" else -1
+        if depth == 0:
+            return end
+    return len(source)
+
+
+def statement_end(source, position):
+    """
+    Return the offset just past the statement starting at position.
+
+    Handles compound statements, nested for/while/switch/if(-else)/do
+    statements and expression statements ending in ';'. An expression
+    statement cut short by the '}' of its enclosing block ends before it.
+    """
+    position = _SPACE.match(source, position).end()
+    for mark, start, end in _marks(_STATEMENT, source, position):
+        if start == position:
+            if mark == "{":
+                return _brace_end(source, start)
+            if mark[-1] == "(":
+                header_end, _ = _parenthesis_end(source, end - 1)
+                body_end = statement_end(source, header_end)
+                if mark.startswith("if"):
+                    after = _SPACE.match(source, body_end).end()
+                    if _ELSE.match(source, after):
+                        return statement_end(source, after + 4)
+                return body_end
+            if mark == "do":
+                return statement_end(source, statement_end(source, end))  # body, then while (...);
+        # Expression statement: up to the next ';' outside brackets
+        depth = 0
+        for mark, start, end in _marks(_STATEMENT, source, start):
+            if mark in ("(", "{") or mark[-1] == "(":
+                depth += 1
+            elif mark in (")", "}"):
+                if depth == 0:
+                    return start
+                depth -= 1
+            elif mark == ";" and depth == 0:
+                return end
+        break
+    return len(source)
+
+
+def loop_spans(source, any_loop=False):
+    """
+    Locate the outermost for loops of source.
+
+    Nested loops are part of their enclosing loop's span and not reported on
+    their own. A "for" whose header lacks two semicolons (e.g. a range-based
+    for) is not a loop here, but loops in its body are.
+
+    Args:
+        source (str): C++ source code.
+        any_loop (bool): Also locate while and do-while loops (and range-based
+                         for loops), e.g. to find the loops reading the input.
+
+    Returns:
+        list: (start, end) offsets of each loop, so source[start:end] is the
+        loop from its "for" (or "while"/"do") keyword to the end of its body.
+    """
+    header = _ANY_LOOP_HEADER if any_loop else _FOR_HEADER
+    spans = []
+    position = 0
+    while True:
+        loop = next(_marks(header, source, position), None)
+        if loop is None:
+            return spans
+        mark, start, end = loop
+        if mark == "do":
+            position = statement_end(source, start)
+            spans.append((start, position))
+            continue
+        header_end, semicolons = _parenthesis_end(source, end - 1)
+        if semicolons < 2 and not any_loop:
+            position = end
+            continue
+        position = statement_end(source, header_end)
+        spans.append((start, position))
@@ -0,0 +1,69 @@
+"""
+CPU affinity helpers for keeping benchmark runs away from concurrent work.
+
+Pinning relies on the Linux taskset utility; where it is missing the helpers
+degrade to no-ops so callers do not need to check.
+"""
+
+import os
+import shutil
+
+_TASKSET = shutil.which("taskset")
+
+
+def available_cpus():
+    """
+    Return the sorted list of CPU ids this process may run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_list(spec):
+    """
+    Parse a Linux-style CPU list such as "0-3,6" into a set of CPU ids.
+
+    Args:
+        spec (str): CPU list; empty, None or "none" means no pinning.
+
+    Returns:
+        set: CPU ids, or an empty set when pinning is disabled.
+    """
+    cpus = set()
+    if spec is None:
+        return cpus
+    spec = str(spec).strip()
+    if not spec or spec.lower() == "none":
+        return cpus
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            low, high = part.split("-", 1)
+            cpus.update(range(int(low), int(high) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def pinned_command(command, cpus):
+    """
+    Prefix a command with taskset so it runs pinned to cpus.
+
+    taskset is used instead of a preexec_fn because the commands are launched
+    from worker threads, where preexec_fn is not safe.
+
+    Args:
+        command (list): Command and arguments.
+        cpus (iterable): CPU ids to pin to.
+
+    Returns:
+        list: The pinned command, or command unchanged if cpus is empty or
+        taskset is unavailable.
+    """
+    cpus = sorted(set(cpus or ()))
+    if not cpus or _TASKSET is None:
+        return list(command)
+    return [_TASKSET, "-c", ",".join(str(cpu) for cpu in cpus), *command]
@@ -0,0 +1,276 @@
+"""
+Small on-disk, content-addressed cache used by the Specbot backend.
+
+Each entry is stored as one JSON file named after the SHA-256 of its key parts,
+so entries survive server restarts and can be shared by concurrent workers.
+Entries expire after a TTL (checked lazily on read) and the least recently used
+ones are evicted in batches once the cache grows past its entry limit. FileCache applies
+the same scheme to whole files, bounded by their total size.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Eviction removes entries down to this fraction of the limit, so the directory
+# scan it needs happens once per many writes instead of on every write
+EVICTION_LOW_WATER = 0.9
+
+
+def make_key(*parts):
+    """
+    Build a content-addressed cache key from arbitrary key parts.
+
+    Args:
+        *parts: Values identifying the cached computation (converted to str).
+
+    Returns:
+        str: Hex SHA-256 digest of the parts.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8", "replace"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    JSON value cache stored as one file per key.
+
+    Access time is tracked through the file mtime, which is refreshed on every
+    hit, so eviction can pick the least recently used entries without keeping
+    a separate index. Only the entry count is kept in memory; the directory is
+    scanned when it passes max_entries, which also corrects the count for
+    entries written or removed by other processes.
+    """
+
+    def __init__(self, directory, ttl=None, max_entries=None):
+        """
+        Args:
+            directory (str): Directory holding the cache files.
+            ttl (float): Seconds after which an entry expires (None = never).
+            max_entries (int): Maximum number of entries kept (None = unbounded).
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._count = None  # entries on disk, counted on first write
+        self._count_lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """
+        Return the cached value for key, or None on a miss or expired entry.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r") as file:
+                entry = json.load(file)
+            if self.ttl is not None and time.time() - entry.get("created", 0) > self.ttl:
+                if self._remove(path):
+                    self._adjust_count(-1)
+                return None
+            # Refresh the mtime so LRU eviction keeps hot entries
+            os.utime(path, None)
+            return entry.get("value")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def set(self, key, value):
+        """
+        Store a JSON-serializable value under key and enforce the size limit.
+        """
+        tmp_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            is_new = not os.path.exists(path)
+            # Write to a temp file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as file:
+                json.dump({"created": time.time(), "value": value}, file)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Warning: Could not write cache entry {key}: {e}")
+            if tmp_path:
+                self._remove(tmp_path)
+            return
+        if self.max_entries is None:
+            return
+        with self._count_lock:
+            if self._count is None:
+                self._count = self._scan_count()
+            elif is_new:
+                self._count += 1
+            over_limit = self._count > self.max_entries
+        if over_limit:
+            self.evict()
+
+    def _scan_count(self):
+        try:
+            return sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+        except OSError:
+            return 0
+
+    def _adjust_count(self, delta):
+        with self._count_lock:
+            if self._count is not None:
+                self._count = max(0, self._count + delta)
+
+    def evict(self):
+        """
+        Remove the least recently used entries once over max_entries.
+
+        Entries are removed down to EVICTION_LOW_WATER of the limit, so the
+        next writes do not have to evict again.
+        """
+        if self.max_entries is None:
+            return
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        except OSError:
+            return
+        if len(names) <= self.max_entries:
+            with self._count_lock:
+                self._count = len(names)
+            return
+
+        entries = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+        entries.sort()
+        keep = int(self.max_entries * EVICTION_LOW_WATER)
+        for _, path in entries[:len(entries) - keep]:
+            self._remove(path)
+        with self._count_lock:
+            self._count = min(len(entries), keep)
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".json"):
+                self._remove(os.path.join(self.directory, name))
+        with self._count_lock:
+            self._count = 0
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+class FileCache:
+    """
+    Cache of whole files (such as built executables) stored under their key.
+
+    Like DiskCache, recency is tracked through the file mtime; eviction removes
+    the least recently used files once their total size exceeds max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=None):
+        """
+        Args:
+            directory (str): Directory holding the cached files.
+            max_bytes (int): Maximum total size of the cached files (None = unbounded).
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def fetch(self, key, destination):
+        """
+        Place the cached file for key at destination.
+
+        The file is hard-linked when possible and copied otherwise, so the
+        caller may delete destination without touching the cache.
+
+        Returns:
+            bool: True on a hit, False on a miss.
+        """
+        path = self._path(key)
+        try:
+            os.utime(path, None)
+            DiskCache._remove(destination)
+            try:
+                os.link(path, destination)
+            except OSError:
+                shutil.copy2(path, destination)
+            return True
+        except OSError:
+            return False
+
+    def store(self, key, source):
+        """
+        Copy source into the cache under key and enforce the size limit.
+        """
+        tmp_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Copy to a temp file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            os.close(fd)
+            shutil.copy2(source, tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Warning: Could not write cache file {key}: {e}")
+            if tmp_path:
+                DiskCache._remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used files while over max_bytes.
+        """
+        if self.max_bytes is None:
+            return
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".bin")]
+        except OSError:
+            return
+
+        entries = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            DiskCache._remove(path)
+            total -= size
+
+    def clear(self):
+        """Remove every file from the cache."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".bin"):
+                DiskCache._remove(os.path.join(self.directory, name))
@@ -0,0 +1,149 @@
+"""
+Registry of target-hardware profiles.
+
+A profile describes the machine the optimized code is meant for: core count,
+cache sizes, memory size and bandwidth, and the preferred OpenMP schedule.
+Profiles are loaded from a local JSON file (hardware_profiles.json next to this
+module, or SPECBOT_HARDWARE_PROFILES). The built-in "host" profile describes
+the machine the backend runs on and is used when no other profile matches.
+"""
+
+import functools
+import json
+import math
+import os
+
+from cache_topology import host_cache_topology
+from cpu_affinity import available_cpus
+
+HARDWARE_PROFILES_PATH = os.environ.get(
+    "SPECBOT_HARDWARE_PROFILES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "hardware_profiles.json")
+)
+HOST_PROFILE = "host"
+# Memory bandwidth one thread of a streaming loop can use (GB/s); loops that are
+# memory bound get no more threads than the profile's bandwidth can feed
+THREAD_MEMORY_BANDWIDTH_GBPS = float(os.environ.get("SPECBOT_THREAD_MEMORY_BANDWIDTH_GBPS", 6))
+
+_REQUIRED_CACHE_LEVELS = ("L1", "L2", "L3")
+
+
+def _host_memory_gb():
+    try:
+        with open("/proc/meminfo", "r") as file:
+            for line in file:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) / 1024**2  # kB to GB
+    except (OSError, ValueError, IndexError):
+        pass
+    return 8
+
+
+@functools.lru_cache(maxsize=None)
+def host_profile():
+    """
+    Return the profile of the machine the backend runs on.
+    """
+    bandwidth = os.environ.get("SPECBOT_HOST_MEMORY_BANDWIDTH_GBPS")
+    return {
+        "name": HOST_PROFILE,
+        "description": "The backend host, as detected at startup",
+        "aliases": [],
+        "cores": len(available_cpus()),
+        "caches": dict(host_cache_topology()["hierarchy"]),
+        "memory_gb": round(_host_memory_gb(), 1),
+        "memory_bandwidth_gbps": float(bandwidth) if bandwidth else None,
+        "schedule": "dynamic",
+    }
+
+
+def _normalize_profile(name, profile):
+    caches = dict(profile.get("caches") or {})
+    missing = [level for level in _REQUIRED_CACHE_LEVELS if not isinstance(caches.get(level), int)]
+    if missing:
+        raise ValueError(f"profile '{name}' lacks cache sizes for {', '.join(missing)}")
+    return {
+        "name": name,
+        "description": profile.get("description", ""),
+        "aliases": [alias.lower() for alias in profile.get("aliases", [])],
+        "cores": int(profile.get("cores") or 1),
+        "caches": caches,
+        "memory_gb": float(profile.get("memory_gb") or 8),
+        "memory_bandwidth_gbps": profile.get("memory_bandwidth_gbps"),
+        "schedule": profile.get("schedule", "dynamic"),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def load_profiles(path=HARDWARE_PROFILES_PATH):
+    """
+    Load the profile registry, with the host profile added.
+
+    Invalid profiles are skipped with a warning; a missing or unreadable file
+    leaves only the host profile.
+
+    Returns:
+        dict: Profiles by name.
+    """
+    profiles = {HOST_PROFILE: host_profile()}
+    try:
+        with open(path, "r") as file:
+            raw_profiles = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not load hardware profiles from {path}: {e}")
+        return profiles
+
+    for name, profile in raw_profiles.items():
+        try:
+            profiles[name] = _normalize_profile(name, profile)
+        except (TypeError, ValueError, AttributeError) as e:
+            print(f"Warning: Skipping hardware profile '{name}': {e}")
+    return profiles
+
+
+def find_profile(requested):
+    """
+    Return the profile whose name or alias is requested (case-insensitive), or None.
+    """
+    key = str(requested or "").strip().lower()
+    if key:
+        for name, profile in load_profiles().items():
+            if key == name.lower() or key in profile["aliases"]:
+                return profile
+    return None
+
+
+def select_profile(requested=None):
+    """
+    Pick the profile matching a profile name, alias or core_type string.
+
+    Args:
+        requested (str): Profile name or alias, e.g. the request's core_type.
+
+    Returns:
+        dict: The matching profile, or the host profile if nothing matches.
+    """
+    return find_profile(requested) or load_profiles()[HOST_PROFILE]
+
+
+def memory_bound_thread_limit(profile):
+    """
+    Return the most threads a memory-bound loop can use on profile, or None if unknown.
+    """
+    bandwidth = profile.get("memory_bandwidth_gbps")
+    if not bandwidth:
+        return None
+    return max(1, math.ceil(bandwidth / THREAD_MEMORY_BANDWIDTH_GBPS))
+
+
+def choose_schedule(profile, loop_complexity):
+    """
+    Return the OpenMP schedule kind for a loop on profile.
+
+    Simple (memory-bound) loops get a static schedule when the profile cannot
+    feed all its cores from memory, since dynamic scheduling only adds overhead
+    there; other loops use the profile's preferred schedule.
+    """
+    limit = memory_bound_thread_limit(profile)
+    if loop_complexity <= 2 and limit is not None and limit < profile["cores"]:
+        return "static"
+    return profile.get("schedule") or "dynamic"
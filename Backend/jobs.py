@@ -0,0 +1,156 @@
+"""
+Background jobs for the long-running Specbot endpoints.
+
+/upload (tile-size sweeps) and /Analysis (benchmark runs) can take minutes. The
+job API runs them on a background executor instead of the request thread and
+lets clients poll or stream the job's progress, including partial results for
+every loop or input file as soon as they exist.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Jobs executed at once; further submissions wait in the executor's queue
+JOB_WORKERS = int(os.environ.get("SPECBOT_JOB_WORKERS", 2))
+# Seconds a finished job stays readable before it is discarded
+JOB_RETENTION = float(os.environ.get("SPECBOT_JOB_RETENTION", 3600))
+
+
+class Job:
+    """
+    State of one background job.
+
+    Progress is a mapping of step name (e.g. "loop 3" or "parallel/input_2.txt")
+    to its status; partial holds the result of each finished step. Every change
+    bumps version, which lets streaming clients wait for the next update.
+    """
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.progress = {}
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.updated = self.created
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def _touch(self):
+        self.updated = time.time()
+        self.version += 1
+        self._changed.notify_all()
+
+    def report(self, step, status, result=None):
+        """
+        Record the status of one step, and its result once available.
+
+        Used as the progress callback of Parinomo and get_Insights.
+        """
+        with self._changed:
+            self.progress[step] = status
+            if result is not None:
+                self.partial[step] = result
+            self._touch()
+
+    def set_status(self, status, result=None, error=None):
+        with self._changed:
+            self.status = status
+            if result is not None:
+                self.result = result
+            if error is not None:
+                self.error = error
+            self._touch()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def snapshot(self):
+        """
+        Return a JSON-serializable copy of the job state.
+        """
+        with self._changed:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "partial": dict(self.partial),
+                "result": self.result,
+                "error": self.error,
+                "created": self.created,
+                "updated": self.updated,
+                "version": self.version,
+            }
+
+    def wait_for_change(self, version, timeout=None):
+        """
+        Block until the job changes past version or timeout expires.
+
+        Returns:
+            bool: True if the job changed.
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version != version, timeout)
+
+
+class JobManager:
+    """
+    Runs jobs on a thread pool and keeps them addressable by id.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, retention=JOB_RETENTION):
+        """
+        Args:
+            max_workers (int): Jobs executed at once.
+            retention (float): Seconds finished jobs are kept.
+        """
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="specbot-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, function, *args, **kwargs):
+        """
+        Queue function(job, *args, **kwargs) as a new job.
+
+        The function reports progress through job.report and returns the job's
+        final, JSON-serializable result.
+
+        Returns:
+            Job: The queued job.
+        """
+        self._prune()
+        job = Job(kind)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, function, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """
+        Return the job with job_id, or None if unknown or expired.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @staticmethod
+    def _run(job, function, args, kwargs):
+        job.set_status("running")
+        try:
+            job.set_status("done", result=function(job, *args, **kwargs))
+        except Exception as e:
+            print(f"Error in {job.kind} job {job.id}: {e}")
+            job.set_status("failed", error=str(e))
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.updated < cutoff]:
+                del self._jobs[job_id]
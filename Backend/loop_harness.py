@@ -0,0 +1,243 @@
+"""
+Benchmark harnesses built from the user's own loop nest.
+
+The tile search times the tiled candidate the user will actually receive: the
+tiled loop is placed in a kernel function, every array it subscripts is
+declared with extents derived from the loop bounds, symbolic bounds are bound
+to a scaled-down problem size, and the remaining free variables become scalars
+of the same type. Loops the generator cannot model safely (calls, member access,
+indirect subscripts, bit operations, ...) yield None so the caller can fall
+back to its reference kernel.
+
+build_sweep_harness emits one program for all candidate tile sizes: the tile
+size becomes a runtime parameter of the kernel, the sizes are passed on the
+command line and timed interleaved, so a whole sweep needs a single compile.
+"""
+
+import os
+import re
+
+# Elements per array the problem is scaled to, e.g. 2^20 -> 1D n = 1048576, 2D 1024 x 1024
+HARNESS_PROBLEM_ELEMENTS = int(os.environ.get("SPECBOT_HARNESS_PROBLEM_ELEMENTS", 1 << 20))
+# Upper bound on the elements of all arrays together; larger loops use the reference kernel
+HARNESS_MAX_ELEMENTS = int(os.environ.get("SPECBOT_HARNESS_MAX_ELEMENTS", 1 << 23))
+# Timed executions of the kernel per run (after one warm-up execution)
+HARNESS_ITERATIONS = int(os.environ.get("SPECBOT_HARNESS_ITERATIONS", 3))
+# Element type of every benchmarked array; the analytical tile model assumes the same size
+HARNESS_ELEMENT_TYPE = "double"
+HARNESS_ELEMENT_SIZE = 8  # sizeof(HARNESS_ELEMENT_TYPE)
+# Extra elements per dimension so subscripts such as a[i + 1] stay in bounds
+_PADDING = 8
+
+_CXX_KEYWORDS = {
+    "auto", "bool", "break", "case", "char", "const", "continue", "default", "do", "double", "else",
+    "false", "float", "for", "if", "int", "long", "return", "short", "signed", "size_t", "static",
+    "switch", "true", "unsigned", "void", "while",
+}
+# Functions the kernel may call; everything else could have side effects or be undefined
+_ALLOWED_CALLS = {
+    "std", "min", "max", "abs", "fabs", "sqrt", "exp", "log", "sin", "cos", "tan", "pow",
+    "floor", "ceil", "fmin", "fmax",
+}
+_CONTROL_KEYWORDS = {"for", "if", "while", "switch", "return"}
+
+_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_LOOP_HEADER = re.compile(
+    r"for\s*\(\s*(?:int\s+)?(?P<var>[A-Za-z_]\w*)\s*=\s*(?P<start>[^;]+);\s*(?P=var)\s*(?:<=|<|>=|>)\s*(?P<end>[^;]+);"
+)
+_DECLARATION = re.compile(
+    r"\b(?:const\s+)?(?:(?:unsigned|signed|long|short)\s+)*(?:int|float|double|long|char|bool|auto|size_t|short)\s+([A-Za-z_]\w*)"
+)
+_SUBSCRIPTED = re.compile(r"\b([A-Za-z_]\w*)((?:\s*\[[^\[\]]*\])+)")
+_SUBSCRIPT = re.compile(r"\[([^\[\]]*)\]")
+_SIMPLE_INDEX = re.compile(r"^\s*(?:[A-Za-z_]\w*|\d+)(?:\s*[+-]\s*\d+)?\s*$")
+_CALL = re.compile(r"\b([A-Za-z_]\w*)\s*\(")
+_TILE_DECLARATION = re.compile(r"const\s+int\s+TILE_SIZE\s*=\s*\d+\s*;")
+_IDENTIFIER = re.compile(r"\b[A-Za-z_]\w*\b")
+_INTEGER = re.compile(r"\b\d+\b")
+_UNSUPPORTED = re.compile(r"->|\[[^\]]*\[|\.\s*[A-Za-z_]|[%^~\"']|<<|>>|(?<!&)&(?!&)|(?<!\|)\|(?!\|)|\bgoto\b|\bnew\b|\bdelete\b")
+
+
+def analyze_loop(tiled_loop):
+    """
+    Work out the declarations a tiled loop needs to compile on its own.
+
+    Args:
+        tiled_loop (str): Tiled loop as produced by generate_tiled_loop.
+
+    Returns:
+        dict: 'code' (comment-free loop), 'arrays' (name -> dimensions),
+        'extent' (elements per array dimension), 'bounds' (symbolic bound
+        names), 'side' (value bound to them) and 'scalars' (free variables),
+        or None if the loop cannot be benchmarked on its own.
+    """
+    if not tiled_loop or tiled_loop.startswith("Invalid"):
+        return None
+    code = _COMMENT.sub("", tiled_loop)
+    if _UNSUPPORTED.search(code):
+        return None
+
+    headers = list(_LOOP_HEADER.finditer(code))
+    if not headers:
+        return None
+    loop_vars = {header.group("var") for header in headers}
+    declared = set(_DECLARATION.findall(code)) | loop_vars
+
+    for call in _CALL.finditer(code):
+        if call.group(1) not in _ALLOWED_CALLS and call.group(1) not in _CONTROL_KEYWORDS:
+            return None
+
+    # Arrays: every subscript must be a loop variable or constant, optionally +/- a constant
+    arrays = {}
+    for access in _SUBSCRIPTED.finditer(code):
+        name, subscripts = access.group(1), _SUBSCRIPT.findall(access.group(2))
+        for expression in subscripts:
+            if not _SIMPLE_INDEX.match(expression):
+                return None
+            if any(identifier not in loop_vars for identifier in _IDENTIFIER.findall(expression)):
+                return None
+        if arrays.setdefault(name, len(subscripts)) != len(subscripts):
+            return None
+    if not arrays or set(arrays) & declared:
+        return None
+
+    # Symbolic bounds get the scaled-down problem size; literal bounds are kept as written
+    bounds, literals = set(), []
+    for header in headers:
+        for part in (header.group("start"), header.group("end")):
+            bounds.update(_IDENTIFIER.findall(part))
+            literals.extend(int(value) for value in _INTEGER.findall(part))
+    bounds -= loop_vars | _ALLOWED_CALLS | {"TILE_SIZE"}
+
+    side = max(8, int(round(HARNESS_PROBLEM_ELEMENTS ** (1 / max(arrays.values())))))
+    extent = max([side] + literals) + _PADDING
+    if sum(extent ** dimensions for dimensions in arrays.values()) > HARNESS_MAX_ELEMENTS:
+        return None
+
+    free = set(_IDENTIFIER.findall(code)) - _CXX_KEYWORDS - _ALLOWED_CALLS - declared - set(arrays) - {"TILE_SIZE"}
+    return {
+        "code": code,
+        "arrays": arrays,
+        "extent": extent,
+        "bounds": sorted(bounds & free),
+        "side": side,
+        "scalars": sorted(free - bounds),
+    }
+
+
+def _declarations(model):
+    lines = [f"const int {name} = {model['side']};" for name in model["bounds"]]
+    for name, dimensions in sorted(model["arrays"].items()):
+        extents = f"[{model['extent']}]" * dimensions
+        lines.append(f"static {HARNESS_ELEMENT_TYPE} {name}{extents};")
+    lines.extend(f"{HARNESS_ELEMENT_TYPE} {name} = 1.0;" for name in model["scalars"])
+    return "\n".join(lines)
+
+
+def _fill_and_checksum(model):
+    element = HARNESS_ELEMENT_TYPE
+    fills = [f"    std::fill_n(reinterpret_cast<{element} *>({name}), sizeof({name}) / sizeof({element}), 1.0);"
+             for name in sorted(model["arrays"])]
+    terms = [f"reinterpret_cast<{element} *>({name})[0]" for name in sorted(model["arrays"])] + model["scalars"]
+    return "\n".join(fills), " + ".join(terms)
+
+
+def _program(model, kernel_parameters, main_body):
+    fills, checksum = _fill_and_checksum(model)
+    return f"""#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <cstdlib>
+#include <iostream>
+#include <vector>
+
+using namespace std;
+
+{_declarations(model)}
+
+static void kernel({kernel_parameters}) {{
+{model['code']}
+}}
+
+int main(int argc, char **argv) {{
+{fills}
+{main_body}
+    std::cerr << ({checksum}) << std::endl;
+    return 0;
+}}
+"""
+
+
+def build_loop_harness(tiled_loop):
+    """
+    Build a harness that times one tiled candidate of the user's loop.
+
+    The program prints the time of HARNESS_ITERATIONS kernel executions in
+    microseconds on stdout (and a checksum on stderr so the work is kept).
+
+    Args:
+        tiled_loop (str): Tiled loop as produced by generate_tiled_loop,
+                          including its TILE_SIZE declaration.
+
+    Returns:
+        str: Complete C++ program, or None if the loop cannot be modelled.
+    """
+    model = analyze_loop(tiled_loop)
+    if model is None:
+        return None
+    return _program(model, "", f"""
+    kernel();  // warm up
+    auto start = std::chrono::high_resolution_clock::now();
+    for (int iter = 0; iter < {HARNESS_ITERATIONS}; iter++) {{
+        kernel();
+        asm volatile("" ::: "memory");
+    }}
+    auto end = std::chrono::high_resolution_clock::now();
+    auto duration = std::chrono::duration_cast<std::chrono::microseconds>(end - start);
+    std::cout << duration.count() << std::endl;
+""")
+
+
+def build_sweep_harness(tiled_loop):
+    """
+    Build one harness that times every candidate tile size of the user's loop.
+
+    The program is run as `harness ROUNDS TILE...`. It warms up each tile size
+    once, then for every round times HARNESS_ITERATIONS kernel executions per
+    tile size, rotating the order each round so frequency drift is spread over
+    all candidates. Each measurement is printed as a "TILE MICROSECONDS" line.
+
+    Args:
+        tiled_loop (str): Tiled loop as produced by generate_tiled_loop (any tile size).
+
+    Returns:
+        str: Complete C++ program, or None if the loop cannot be modelled.
+    """
+    model = analyze_loop(tiled_loop)
+    if model is None or not _TILE_DECLARATION.search(model["code"]):
+        return None
+    model["code"] = _TILE_DECLARATION.sub("", model["code"])
+    return _program(model, "const int TILE_SIZE", f"""
+    int rounds = argc > 1 ? std::atoi(argv[1]) : 1;
+    std::vector<int> tiles;
+    for (int arg = 2; arg < argc; arg++) {{
+        tiles.push_back(std::max(1, std::atoi(argv[arg])));
+    }}
+
+    for (int tile : tiles) {{
+        kernel(tile);  // warm up
+    }}
+    for (int round = 0; round < rounds; round++) {{
+        for (size_t k = 0; k < tiles.size(); k++) {{
+            int tile = tiles[(k + round) % tiles.size()];
+            auto start = std::chrono::high_resolution_clock::now();
+            for (int iter = 0; iter < {HARNESS_ITERATIONS}; iter++) {{
+                kernel(tile);
+                asm volatile("" ::: "memory");
+            }}
+            auto end = std::chrono::high_resolution_clock::now();
+            auto duration = std::chrono::duration_cast<std::chrono::microseconds>(end - start);
+            std::cout << tile << " " << duration.count() << std::endl;
+        }}
+    }}
+""")
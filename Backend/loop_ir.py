@@ -0,0 +1,425 @@
+"""
+Shared intermediate representation of a loop.
+
+Parinomo runs a dozen analyses on every loop. Instead of each one re-scanning
+the loop text with its own regexes, loop_ir tokenizes the loop once (see
+cpp_lexer) and records what the analyses need: the header fields, the tree of
+nested loops, every array reference with its index expressions, the first read
+and write of each scalar, declarations, calls, I/O and jump statements.
+
+IRs are cached by loop text, so analyses that receive the same loop string
+share one IR; results derived from the text can be memoized on it as well.
+"""
+
+import functools
+import os
+from collections import Counter
+
+from cpp_lexer import loop_spans, tokenize
+
+# Loops whose IR is kept; Parinomo builds one per loop and per normalized loop
+LOOP_IR_CACHE_SIZE = int(os.environ.get("SPECBOT_LOOP_IR_CACHE_SIZE", 4096))
+
+TYPE_KEYWORDS = {
+    "int", "float", "double", "char", "bool", "long", "short", "unsigned", "signed", "void", "auto",
+    "size_t", "const", "static", "string",
+}
+KEYWORDS = TYPE_KEYWORDS | {
+    "for", "if", "else", "while", "do", "switch", "case", "default", "break", "continue", "return", "goto",
+    "struct", "enum", "class", "true", "false", "nullptr", "sizeof", "new", "delete", "std", "this",
+}
+IO_NAMES = {
+    "cin", "cout", "cerr", "clog", "printf", "scanf", "getline", "puts", "gets", "getchar", "putchar",
+    "fprintf", "fscanf",
+}
+ASSIGNMENT_OPERATORS = {"=", "+=", "-=", "*=", "/=", "%=", "&=", "|=", "^=", "<<=", ">>="}
+_INCREMENTS = {"++", "--"}
+_JUMPS = {"break", "return", "goto"}
+# OpenMP reduction operator of each compound assignment that can update a reduction.
+# Partial results of `-` are combined by adding them, so it reduces as `+` (the `-`
+# reduction identifier is deprecated since OpenMP 5.2)
+_COMPOUND_REDUCTIONS = {"+=": "+", "-=": "+", "*=": "*", "&=": "&", "|=": "|", "^=": "^"}
+# The same for `x = x op expr`
+_BINARY_REDUCTIONS = {"+": "+", "-": "+", "*": "*", "&": "&", "|": "|", "^": "^", "&&": "&&", "||": "||"}
+# `x = min(x, ...)` / `x = max(x, ...)`, with or without std::
+_MIN_MAX_REDUCTIONS = {"min": "min", "max": "max", "fmin": "min", "fmax": "max"}
+# Binding strength of the binary operators (lower binds tighter); `x = x op expr` only
+# reduces if expr has no operator binding looser than op, other than those of its family
+_PRECEDENCE = {
+    "*": 5, "/": 5, "%": 5, "+": 6, "-": 6, "<<": 7, ">>": 7, "<": 9, "<=": 9, ">": 9, ">=": 9,
+    "==": 10, "!=": 10, "&": 11, "^": 12, "|": 13, "&&": 14, "||": 15, "?": 16,
+}
+
+
+class LoopHeader:
+    """
+    Fields of a for (init; condition; step) header.
+
+    Attributes:
+        var (str): Loop variable, or None if the init is not `[type] var = start`.
+        var_type (str): Type declared in the init (e.g. "int"), or None.
+        start (str): Initial value expression.
+        comparator (str): Comparison operator of the condition (<, <=, > or >=), or None.
+        end (str): Bound expression of the condition.
+        step (str): Increment expression, e.g. "i++" or "i += 2".
+        text_end (int): Offset just past the header's ')' in the loop text.
+    """
+
+    def __init__(self, var, var_type, start, comparator, end, step, text_end):
+        self.var = var
+        self.var_type = var_type
+        self.start = start
+        self.comparator = comparator
+        self.end = end
+        self.step = step
+        self.text_end = text_end
+
+
+class ArrayRef:
+    """
+    One subscripted access such as a[i][j + 1].
+
+    Attributes:
+        name (str): Array name.
+        indices (tuple): Index expressions, one per subscript, as written.
+        write (bool): True if the element is assigned or incremented.
+        line (int): Line of the loop text (1-based) the access is on.
+    """
+
+    __slots__ = ("name", "indices", "write", "line")
+
+    def __init__(self, name, indices, write, line):
+        self.name = name
+        self.indices = indices
+        self.write = write
+        self.line = line
+
+    def __repr__(self):
+        return f"ArrayRef({self.name}{''.join(f'[{index}]' for index in self.indices)}, write={self.write})"
+
+
+class LoopIR:
+    """
+    Facts about one loop, gathered in a single pass over its tokens.
+
+    Attributes:
+        text (str): Loop source text.
+        tokens (list): cpp_lexer tokens of the text.
+        header (LoopHeader): Header fields, or None if text does not start with a for loop.
+        children (list): LoopIR of each loop directly nested in the body.
+        array_refs (list): ArrayRef of every subscripted access, in source order.
+        scalar_reads (dict): Scalar name -> token index of its first read.
+        scalar_writes (dict): Scalar name -> token index of its first write. An
+        assignment stores its value after evaluating it, so its write is at the
+        end of the assigned expression (and that of ++/-- just after the name).
+        declarations (list): Names declared in the loop (header included), in order.
+        calls (set): Names of called functions.
+        has_io (bool): The loop performs console or file I/O.
+        jumps (set): Jump keywords used in the loop (break, return, goto).
+        reductions (dict): Scalar name -> OpenMP reduction operator ("+", "*",
+        "&", "|", "^", "&&", "||", "min" or "max") of the scalars that are only
+        updated through that operator (e.g. s += x, p = p * x, n++,
+        m = max(m, x)) and never read anywhere else.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = list(tokenize(text))
+        self.header = _parse_header(text, self.tokens)
+        self.array_refs = []
+        self.scalar_reads = {}
+        self.scalar_writes = {}
+        self.declarations = []
+        self.calls = set()
+        self.has_io = False
+        self.jumps = set()
+        self.reductions = {}
+        self._memo = {}
+        self._scan()
+        body = text[self.header.text_end:] if self.header else text
+        offset = len(text) - len(body)
+        # Without a header the text itself may be one loop span; it is not its own child
+        self.children = [
+            loop_ir(text[offset + start:offset + end]) for start, end in loop_spans(body)
+            if (offset + start, offset + end) != (0, len(text))
+        ]
+
+    @property
+    def depth(self):
+        """
+        Number of nested loop levels, this loop included.
+        """
+        return (1 if self.header else 0) + max((child.depth for child in self.children), default=0)
+
+    @property
+    def loop_variables(self):
+        """
+        Variables of this loop's header and of every nested loop's, outermost first.
+        """
+        names = [self.header.var] if self.header and self.header.var else []
+        for child in self.children:
+            names += child.loop_variables
+        return list(dict.fromkeys(names))
+
+    @property
+    def dimensions(self):
+        """
+        Most subscripts of any array access (0 if there are none).
+        """
+        return max((len(ref.indices) for ref in self.array_refs), default=0)
+
+    @property
+    def arrays(self):
+        """
+        Names of the subscripted variables, in order of first use.
+        """
+        return list(dict.fromkeys(ref.name for ref in self.array_refs))
+
+    @property
+    def scalars(self):
+        """
+        Names of the non-subscripted variables read or written, in order of first use.
+        """
+        arrays = set(self.arrays)
+        first_use = dict(self.scalar_reads)
+        for name, index in self.scalar_writes.items():
+            first_use[name] = min(index, first_use.get(name, index))
+        return [name for name in sorted(first_use, key=first_use.get) if name not in arrays]
+
+    def line(self, index):
+        """
+        Line of the loop text (1-based) the token at index is on.
+        """
+        return self.text.count("\n", 0, self.tokens[index].start) + 1
+
+    def memo(self, name, compute):
+        """
+        Return the result of an analysis of this loop, computing it on first use.
+
+        Args:
+            name (str): Analysis name.
+            compute (callable): Called without arguments to produce the result.
+        """
+        if name not in self._memo:
+            self._memo[name] = compute()
+        return self._memo[name]
+
+    def _scan(self):
+        tokens = self.tokens
+        count = len(tokens)
+        declaring = None  # bracket depth of the declaration being read, if any
+        depth = 0
+        updates = {}  # scalar name -> reduction operator of each write (None if it is no update)
+        reads = Counter()
+        for index, token in enumerate(tokens):
+            text = token.text
+            if token.kind == "punct":
+                if text in ("(", "[", "{"):
+                    depth += 1
+                    if text == "{":
+                        declaring = None
+                elif text in (")", "]", "}"):
+                    depth -= 1
+                    if declaring is not None and depth < declaring:
+                        declaring = None
+                elif text == ";":
+                    declaring = None
+                continue
+            if token.kind != "identifier":
+                continue
+            if text in _JUMPS:
+                self.jumps.add(text)
+            if text in IO_NAMES:
+                self.has_io = True
+            if text in TYPE_KEYWORDS:
+                declaring = depth
+                continue
+            if text in KEYWORDS:
+                continue
+
+            previous = tokens[index - 1].text if index else ""
+            following = tokens[index + 1].text if index + 1 < count else ""
+            if previous in (".", "->", "::") or following == "::":
+                continue  # member or qualified name
+            if declaring == depth and (previous in TYPE_KEYWORDS or previous in (",", "*", "&")):
+                if text not in self.declarations:
+                    self.declarations.append(text)
+                if following not in ASSIGNMENT_OPERATORS:
+                    continue
+                self.scalar_writes.setdefault(text, _expression_end(tokens, index + 2))
+                updates.setdefault(text, []).append(None)
+                continue
+            if following == "(":
+                self.calls.add(text)
+                continue
+            if following == "[":
+                self._array_ref(index)
+                continue
+
+            if following in ASSIGNMENT_OPERATORS or following in _INCREMENTS or previous in _INCREMENTS:
+                written = _expression_end(tokens, index + 2) if following in ASSIGNMENT_OPERATORS else index + 1
+                self.scalar_writes.setdefault(text, written)
+                updates.setdefault(text, []).append(self._update_operator(index))
+                if following != "=":
+                    self.scalar_reads.setdefault(text, index)  # compound assignment or ++/-- also reads
+                    reads[text] += 1
+            else:
+                self.scalar_reads.setdefault(text, index)
+                reads[text] += 1
+
+        # Every update reads the scalar once, so any further read sees a partial result
+        for name, operators in updates.items():
+            if operators[0] is not None and len(set(operators)) == 1 and reads[name] == len(operators):
+                self.reductions[name] = operators[0]
+
+    def _update_operator(self, index):
+        # Reduction operator of the write to the scalar at index, or None if it is no update
+        tokens = self.tokens
+        name = tokens[index].text
+        previous = tokens[index - 1].text if index else ""
+        following = tokens[index + 1].text
+        if following in _INCREMENTS or previous in _INCREMENTS:
+            return "+"
+        if following in _COMPOUND_REDUCTIONS:
+            return _COMPOUND_REDUCTIONS[following]
+        if following != "=":
+            return None
+        value = tokens[index + 2:_expression_end(tokens, index + 2)]
+        if len(value) > 2 and value[0].text == name and value[1].text in _BINARY_REDUCTIONS:
+            operator = value[1].text
+            family = {"+", "-"} if operator in ("+", "-") else {operator}
+            for position in range(2, len(value)):
+                text = value[position].text
+                if (position == 2 or text not in _PRECEDENCE or _depth(value, position)
+                        or not _ends_operand(value[position - 1])):
+                    continue  # unary, nested or not an operator
+                if _PRECEDENCE[text] >= _PRECEDENCE[operator] and text not in family:
+                    return None
+            return _BINARY_REDUCTIONS[operator]
+        if len(value) > 3 and value[0].text == "std" and value[1].text == "::":
+            value = value[2:]
+        if (len(value) > 4 and value[0].text in _MIN_MAX_REDUCTIONS and value[1].text == "("
+                and value[2].text == name and value[3].text == ","
+                and _matching(value, 1, "(", ")") == len(value) - 1):
+            return _MIN_MAX_REDUCTIONS[value[0].text]
+        return None
+
+    def _array_ref(self, index):
+        tokens = self.tokens
+        indices = []
+        position = index + 1
+        while position < len(tokens) and tokens[position].text == "[":
+            close = _matching(tokens, position, "[", "]")
+            if close is None:
+                break
+            indices.append(self.text[tokens[position].end:tokens[close].start].strip())
+            position = close + 1
+        previous = tokens[index - 1].text if index else ""
+        following = tokens[position].text if position < len(tokens) else ""
+        write = following in ASSIGNMENT_OPERATORS or following in _INCREMENTS or previous in _INCREMENTS
+        self.array_refs.append(ArrayRef(tokens[index].text, tuple(indices), write, self.line(index)))
+
+
+def _expression_end(tokens, position):
+    # Index just past the expression starting at position: the next ';' or ',' outside
+    # brackets, or the bracket closing the one the expression is in
+    depth = 0
+    for index in range(position, len(tokens)):
+        text = tokens[index].text
+        if text in ("(", "[", "{"):
+            depth += 1
+        elif text in (")", "]", "}"):
+            if depth == 0:
+                return index
+            depth -= 1
+        elif text in (";", ",") and depth == 0:
+            return index
+    return len(tokens)
+
+
+def _depth(tokens, position):
+    # Bracket depth of tokens[position] within tokens
+    depth = 0
+    for token in tokens[:position]:
+        if token.text in ("(", "[", "{"):
+            depth += 1
+        elif token.text in (")", "]", "}"):
+            depth -= 1
+    return depth
+
+
+def _ends_operand(token):
+    # True if a binary operator may follow token (so the operator after it is not unary)
+    return token.kind in ("identifier", "number", "string", "char") or token.text in (")", "]")
+
+
+def _matching(tokens, position, opening, closing):
+    # Index of the bracket closing the one at position, or None
+    depth = 0
+    for index in range(position, len(tokens)):
+        if tokens[index].text == opening:
+            depth += 1
+        elif tokens[index].text == closing:
+            depth -= 1
+            if depth == 0:
+                return index
+    return None
+
+
+def _parse_header(text, tokens):
+    if len(tokens) < 2 or tokens[0].text != "for" or tokens[1].text != "(":
+        return None
+    close = _matching(tokens, 1, "(", ")")
+    if close is None:
+        return None
+    parts, part_start, depth = [], 2, 0
+    for index in range(2, close):
+        token_text = tokens[index].text
+        if token_text in ("(", "[", "{"):
+            depth += 1
+        elif token_text in (")", "]", "}"):
+            depth -= 1
+        elif token_text == ";" and depth == 0:
+            parts.append((part_start, index))
+            part_start = index + 1
+    parts.append((part_start, close))
+    if len(parts) != 3:
+        return None
+
+    def source(part):
+        first, last = part
+        return text[tokens[first].start:tokens[last - 1].end] if last > first else ""
+
+    init, condition, step = parts
+    var = var_type = start = None
+    init_tokens = tokens[init[0]:init[1]]
+    names = [token.text for token in init_tokens]
+    if "=" in names:
+        equals = names.index("=")
+        if equals >= 1 and init_tokens[equals - 1].kind == "identifier":
+            var = names[equals - 1]
+            var_type = " ".join(names[:equals - 1]) or None
+            start = source((init[0] + equals + 1, init[1]))
+
+    comparator = end = None
+    for index in range(condition[0], condition[1]):
+        if tokens[index].text in ("<", "<=", ">", ">="):
+            comparator = tokens[index].text
+            end = source((index + 1, condition[1]))
+            break
+    return LoopHeader(var, var_type, start, comparator, end, source(step), tokens[close].end)
+
+
+@functools.lru_cache(maxsize=LOOP_IR_CACHE_SIZE)
+def loop_ir(text):
+    """
+    Return the IR of a loop, built once per distinct loop text.
+
+    Args:
+        text (str): Loop source, starting at its "for" keyword (other code is
+                    accepted too; its header is then None).
+
+    Returns:
+        LoopIR: Shared, read-only IR of text.
+    """
+    return LoopIR(text)
@@ -0,0 +1,93 @@
+"""
+Summary statistics for repeated benchmark runs.
+
+Used by the analysis pipeline to decide when enough runs have been taken and to
+report each metric as a mean, median, standard deviation and 95% confidence
+interval instead of a bare average.
+"""
+
+import math
+import statistics
+
+# Two-sided 95% critical values of Student's t distribution, by degrees of freedom
+_T_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571,
+    6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+    11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131,
+    16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086,
+    21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060,
+    26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045, 30: 2.042,
+    40: 2.021, 60: 2.000, 120: 1.980,
+}
+
+
+def t_critical(degrees_of_freedom):
+    """
+    Return the two-sided 95% t critical value for the given degrees of freedom.
+
+    Values between table rows use the next smaller row, which errs on the wide
+    (conservative) side; beyond the table the normal value 1.96 is used.
+    """
+    if degrees_of_freedom < 1:
+        return math.inf
+    if degrees_of_freedom > 120:
+        return 1.96
+    return _T_95[max(df for df in _T_95 if df <= degrees_of_freedom)]
+
+
+def confidence_half_width(samples):
+    """
+    Return the half-width of the 95% confidence interval of the mean of samples.
+
+    Args:
+        samples (list): Measured values.
+
+    Returns:
+        float: Half-width, or inf with fewer than two samples.
+    """
+    if len(samples) < 2:
+        return math.inf
+    return t_critical(len(samples) - 1) * statistics.stdev(samples) / math.sqrt(len(samples))
+
+
+def relative_ci_width(samples):
+    """
+    Return the 95% confidence interval half-width relative to the mean.
+
+    Args:
+        samples (list): Measured values.
+
+    Returns:
+        float: Half-width / mean (0 if every sample is 0, inf if undetermined).
+    """
+    half_width = confidence_half_width(samples)
+    mean = statistics.fmean(samples) if samples else 0
+    if math.isinf(half_width):
+        return math.inf
+    if mean == 0:
+        return 0.0 if half_width == 0 else math.inf
+    return half_width / abs(mean)
+
+
+def summarize(samples):
+    """
+    Summarize repeated measurements of one metric.
+
+    Args:
+        samples (list): Measured values.
+
+    Returns:
+        dict: mean, median, stddev, ci_low and ci_high (all 0 for no samples;
+        with a single sample the interval collapses to that value).
+    """
+    if not samples:
+        return {"mean": 0, "median": 0, "stddev": 0, "ci_low": 0, "ci_high": 0}
+    mean = statistics.fmean(samples)
+    half_width = confidence_half_width(samples) if len(samples) > 1 else 0.0
+    return {
+        "mean": mean,
+        "median": statistics.median(samples),
+        "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "ci_low": mean - half_width,
+        "ci_high": mean + half_width,
+    }
@@ -0,0 +1,215 @@
+"""
+Central admission control and resource limits for the Specbot backend.
+
+Requests are admitted into one of two lanes: "static" for the cheap analyses
+(loop extraction, complexity and dependency checks) and "empirical" for work
+that compiles and runs code (tile searches, benchmarks). Each lane runs a
+bounded number of requests and queues a bounded number more; beyond that
+admission fails with QueueFull, which the server turns into a 429 response.
+
+Independently of lanes, every compile and every benchmark run takes a slot
+from a global cap and reserves an estimate of its memory from a shared
+budget, so bursts of requests cannot start more g++ or benchmark processes
+than the host can hold.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from cpu_affinity import available_cpus
+
+_HOST_CPUS = available_cpus()
+
+# Processes allowed at once across all requests
+MAX_CONCURRENT_COMPILES = int(os.environ.get("SPECBOT_MAX_CONCURRENT_COMPILES", max(1, len(_HOST_CPUS) - 1)))
+MAX_CONCURRENT_RUNS = int(os.environ.get("SPECBOT_MAX_CONCURRENT_RUNS", len(_HOST_CPUS)))
+# Memory budget shared by compiles and runs, and the estimate reserved by each (MB)
+MEMORY_BUDGET_MB = int(os.environ.get("SPECBOT_MEMORY_BUDGET_MB", 4096))
+COMPILE_MEMORY_MB = int(os.environ.get("SPECBOT_COMPILE_MEMORY_MB", 512))
+RUN_MEMORY_MB = int(os.environ.get("SPECBOT_RUN_MEMORY_MB", 256))
+
+# Requests running at once, and waiting beyond those, per lane
+LANE_LIMITS = {
+    "static": (int(os.environ.get("SPECBOT_STATIC_LANE_WORKERS", 2 * len(_HOST_CPUS))),
+               int(os.environ.get("SPECBOT_STATIC_LANE_QUEUE", 64))),
+    "empirical": (int(os.environ.get("SPECBOT_EMPIRICAL_LANE_WORKERS", 2)),
+                  int(os.environ.get("SPECBOT_EMPIRICAL_LANE_QUEUE", 8))),
+}
+
+
+class QueueFull(Exception):
+    """
+    Raised when a lane cannot take another request.
+
+    Attributes:
+        lane (str): Name of the full lane.
+        retry_after (int): Suggested seconds before retrying.
+    """
+
+    def __init__(self, lane, retry_after):
+        super().__init__(f"The {lane} queue is full, retry in {retry_after}s")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Lane:
+    """
+    Bounded pool of request slots with a bounded waiting queue.
+    """
+
+    def __init__(self, name, workers, queue_size):
+        """
+        Args:
+            name (str): Lane name used in messages.
+            workers (int): Requests running at once.
+            queue_size (int): Admitted requests allowed to wait for a slot.
+        """
+        self.name = name
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+        self._admitted = 0
+        # Moving average of how long a request holds a slot, for Retry-After
+        self._average_duration = 1.0
+
+    def admit(self):
+        """
+        Reserve a place in the lane without waiting.
+
+        Returns:
+            Ticket: Context manager that waits for a slot and releases it on exit.
+
+        Raises:
+            QueueFull: If the lane already holds capacity requests.
+        """
+        with self._lock:
+            if self._admitted >= self.capacity:
+                raise QueueFull(self.name, self.retry_after())
+            self._admitted += 1
+        return Ticket(self)
+
+    def retry_after(self):
+        """
+        Estimate the seconds until a place frees up.
+        """
+        waiting = max(0, self._admitted - self.workers)
+        return max(1, math.ceil(self._average_duration * (waiting + 1) / self.workers))
+
+    def _finished(self, duration):
+        with self._lock:
+            self._admitted -= 1
+            if duration is not None:
+                self._average_duration = 0.8 * self._average_duration + 0.2 * duration
+
+
+class Ticket:
+    """
+    Admission into a lane; entering it waits for a running slot.
+
+    A ticket is used once. Call cancel() to give up a ticket that is never entered.
+    """
+
+    def __init__(self, lane):
+        self.lane = lane
+        self._started = None
+        self._done = False
+
+    def __enter__(self):
+        self.lane._slots.acquire()
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.lane._slots.release()
+        self._close(time.monotonic() - self._started)
+        return False
+
+    def cancel(self):
+        self._close(None)
+
+    def _close(self, duration):
+        if not self._done:
+            self._done = True
+            self.lane._finished(duration)
+
+
+class MemoryBudget:
+    """
+    Counting budget of estimated megabytes in use.
+    """
+
+    def __init__(self, total_mb):
+        self.total_mb = total_mb
+        self.in_use_mb = 0
+        self._changed = threading.Condition()
+
+    @contextmanager
+    def reserve(self, mb):
+        """
+        Wait until mb fits in the budget and hold it for the block.
+
+        A reservation larger than the whole budget proceeds once nothing else
+        is reserved, so oversized work is serialized instead of blocked forever.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.in_use_mb == 0 or self.in_use_mb + mb <= self.total_mb)
+            self.in_use_mb += mb
+        try:
+            yield
+        finally:
+            with self._changed:
+                self.in_use_mb -= mb
+                self._changed.notify_all()
+
+
+_lanes = {name: Lane(name, workers, queue_size) for name, (workers, queue_size) in LANE_LIMITS.items()}
+_compile_slots = threading.BoundedSemaphore(MAX_CONCURRENT_COMPILES)
+_run_slots = threading.BoundedSemaphore(MAX_CONCURRENT_RUNS)
+memory_budget = MemoryBudget(MEMORY_BUDGET_MB)
+
+
+def admit(lane):
+    """
+    Admit a request into lane ("static" or "empirical").
+
+    Returns:
+        Ticket: Enter it (with ...) to run the request.
+
+    Raises:
+        QueueFull: If the lane is full.
+    """
+    return _lanes[lane].admit()
+
+
+@contextmanager
+def compile_slot(memory_mb=COMPILE_MEMORY_MB):
+    """
+    Hold one of the global compile slots and its memory for the block.
+    """
+    with _compile_slots, memory_budget.reserve(memory_mb):
+        yield
+
+
+@contextmanager
+def run_slot(memory_mb=RUN_MEMORY_MB):
+    """
+    Hold one of the global benchmark-run slots and its memory for the block.
+    """
+    with _run_slots, memory_budget.reserve(memory_mb):
+        yield
+
+
+def status():
+    """
+    Return the current lane occupancy and resource use, for monitoring.
+    """
+    return {
+        "lanes": {name: {"admitted": lane._admitted, "workers": lane.workers, "capacity": lane.capacity}
+                  for name, lane in _lanes.items()},
+        "memory_in_use_mb": memory_budget.in_use_mb,
+        "memory_budget_mb": memory_budget.total_mb,
+    }
@@ -1,43 +1,206 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import firebase_admin
 from firebase_admin import firestore
 from werkzeug.security import generate_password_hash, check_password_hash
 from firebase_config import * 
-from Analysis import Calling_for_analysis
+from Analysis import Calling_for_analysis, insights_records, ANALYSIS_MAX_RUNS
+from concurrent.futures import ThreadPoolExecutor
+from cpu_affinity import available_cpus, parse_cpu_list
+from jobs import JobManager
+from cache_topology import host_cache_topology
+from hardware_profiles import find_profile, load_profiles
+from scheduler import QueueFull
+import scheduler
+import os
+import json
 import pandas as pd  # Ensure you have pandas imported
-from Parinomo import TILE_SIZE
+from Parinomo import TILE_SIZE, ANALYSIS_LEVELS, DEFAULT_ANALYSIS_LEVEL, TILE_SWEEP_WORKERS
 
 from Parinomo import Parinomo
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app)  # Allow Cross-Origin Resource Sharing (CORS) for React frontend
+CORS(app, expose_headers=['Retry-After', 'X-Refinement-Job-Id'])  # Allow Cross-Origin Resource Sharing (CORS) for React frontend
 
 # Initialize Firestore client
 db = firestore.client()
 
+# Runs the serial and parallel analyses of /Analysis requests side by side
+analysis_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("SPECBOT_ANALYSIS_WORKERS", 4)))
+# Background jobs submitted through the /jobs routes
+job_manager = JobManager()
+
+def queue_full_response(error):
+    """
+    Builds the 429 response for a request refused by the scheduler.
+    """
+    response = jsonify({'message': str(error), 'status': 'fail', 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+def upload_lane(data):
+    """
+    Returns the scheduler lane an /upload request body runs in.
+    """
+    # only the empirical tile-size search compiles and runs harnesses
+    if (data.get('analysis_level') or DEFAULT_ANALYSIS_LEVEL) == 'empirical':
+        return 'empirical'
+    return 'static'
+
+# Largest tile size /Analysis accepts; it is compiled into a C++ int constant
+MAX_TILE_SIZE = 2**31 - 1
+
+def parse_whole_number(value, name, high):
+    """
+    Returns the request body field name as an int, or None if it is absent.
+
+    Raises:
+        ValueError: If it is not a whole number between 1 and high
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool) or float(value) != int(float(value)):
+            raise ValueError
+        number = int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{name} must be a whole number")
+    if not 1 <= number <= high:
+        raise ValueError(f"{name} must be between 1 and {high}")
+    return number
+
+def parse_flag(value, name):
+    """
+    Returns the request body field name as a bool, or None if it is absent.
+
+    Accepts JSON booleans, 0/1 and the strings true/false, yes/no, 1/0.
+
+    Raises:
+        ValueError: If it is any other value
+    """
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ("true", "yes", "1", "false", "no", "0"):
+        return value.strip().lower() in ("true", "yes", "1")
+    raise ValueError(f"{name} must be true or false")
+
+def parse_tile_workers(value):
+    """
+    Returns the tile_workers of an /upload request body as an int, or None if it is absent.
+
+    Raises:
+        ValueError: If it is not a whole number between 1 and TILE_SWEEP_WORKERS
+    """
+    return parse_whole_number(value, 'tile_workers', TILE_SWEEP_WORKERS)
+
+def invalid_upload(data):
+    """
+    Returns the 400 response for an invalid /upload request body, or None if it is valid.
+    """
+    if not data or not data.get('core_type') or not data.get('ram_type') or not data.get('code'):
+        return jsonify({'message': 'All fields are required!', 'status': 'fail'}), 400
+    if data.get('analysis_level') and data['analysis_level'] not in ANALYSIS_LEVELS:
+        return jsonify({'message': f"analysis_level must be one of {', '.join(ANALYSIS_LEVELS)}", 'status': 'fail'}), 400
+    if data.get('hardware_profile') and find_profile(data['hardware_profile']) is None:
+        return jsonify({'message': f"Unknown hardware_profile '{data['hardware_profile']}'", 'status': 'fail'}), 400
+    try:
+        parse_tile_workers(data.get('tile_workers'))
+    except ValueError as e:
+        return jsonify({'message': str(e), 'status': 'fail'}), 400
+    return None
+
+def invalid_analysis(data):
+    """
+    Returns the 400 response for an invalid /Analysis request body, or None if it is valid.
+    """
+    if not data or not data.get('P_Code') or not data.get('S_Code'):
+        return jsonify({'message': 'P_Code and S_Code are required!', 'status': 'fail'}), 400
+    try:
+        parse_whole_number(data.get('tile_size'), 'tile_size', MAX_TILE_SIZE)
+        parse_whole_number(data.get('num_runs'), 'num_runs', ANALYSIS_MAX_RUNS)
+        parse_flag(data.get('count_instructions'), 'count_instructions')
+        parse_flag(data.get('force_rerun'), 'force_rerun')
+    except ValueError as e:
+        return jsonify({'message': str(e), 'status': 'fail'}), 400
+    return None
+
+def run_admitted(ticket, function, *args, **kwargs):
+    """
+    Runs function inside a scheduler ticket obtained at submission time.
+    """
+    with ticket:
+        return function(*args, **kwargs)
+
 # Health check endpoint for Docker
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'message': 'Backend is running'}), 200
 
-# Route for file upload
-@app.route('/upload', methods=['POST'])
-def uploadcode():
-    data = request.get_json()
+def run_upload(data, progress=None):
+    """
+    Parallelizes and tiles the code of an /upload request body.
+
+    Args:
+        data (dict): Request body with code, core_type, ram_type and processors_count
+        progress (callable): Optional per-loop progress callback (see Parinomo)
+
+    Returns:
+        dict: Parinomo's per-loop results
+    """
     core_type = data.get('core_type')
     ram_type = data.get('ram_type')
     Scode = data.get('code')
     processors_count = data.get('processors_count')
+    # optional per-request cap on concurrent harness compiles during the tile search
+    tile_workers = parse_tile_workers(data.get('tile_workers'))
+    # 'static', 'cached' or 'empirical' tile sizes (default: SPECBOT_ANALYSIS_LEVEL)
+    analysis_level = data.get('analysis_level')
+    # optional target profile name (see /hardware/profiles); otherwise core_type selects one
+    hardware_profile = data.get('hardware_profile')
 
-    Pcode = Parinomo(Scode, core_type, ram_type,processors_count)
+    return Parinomo(Scode, core_type, ram_type, processors_count, tile_workers=tile_workers, progress=progress,
+                    analysis_level=analysis_level, hardware_profile=hardware_profile)
 
-    if not core_type or not ram_type or not Scode:
-        return jsonify({'message': 'All fields are required!', 'status': 'fail'}), 400
-    else:
-        # returning code to frontend with new JSON structure
-        return jsonify(Pcode), 200
+# Route for file upload
+@app.route('/upload', methods=['POST'])
+def uploadcode():
+    data = request.get_json()
+    invalid = invalid_upload(data)
+    if invalid:
+        return invalid
+
+    try:
+        ticket = scheduler.admit(upload_lane(data))
+    except QueueFull as e:
+        return queue_full_response(e)
+    with ticket:
+        Pcode = run_upload(data)
+    # returning code to frontend with new JSON structure
+    response = jsonify(Pcode)
+
+    # optional empirical refinement of a static/cached answer, run as a follow-up job
+    if data.get('refine') and upload_lane(data) != 'empirical':
+        job = submit_upload(dict(data, analysis_level='empirical'))
+        if isinstance(job, str):
+            response.headers['X-Refinement-Job-Id'] = job
+    return response, 200
+
+def submit_upload(data):
+    """
+    Queues an /upload request body as a background job.
+
+    Returns:
+        str: The job id, or the 429 response if the scheduler lane is full
+    """
+    try:
+        ticket = scheduler.admit(upload_lane(data))
+    except QueueFull as e:
+        return queue_full_response(e)
+    job = job_manager.submit('upload', lambda job, data: run_admitted(ticket, run_upload, data, progress=job.report), data)
+    return job.id
 
 # Route for user signup
 @app.route('/signup', methods=['POST'])
@@ -93,29 +256,71 @@ def login():
     return jsonify({'success': False, 'message': 'Invalid email or password!'}), 401
 
 
+def run_analysis(data, progress=None):
+    """
+    Benchmarks the parallel and serial code of an /Analysis request body.
+
+    Args:
+        data (dict): Request body with P_Code, S_Code and the optional analysis settings
+        progress (callable): Optional per-input progress callback; steps are prefixed
+                             with "parallel/" or "serial/"
+
+    Returns:
+        dict: P_Analysis and S_Analysis result records
+    """
+    P_Code = data.get('P_Code')
+    S_Code = data.get('S_Code')
+    # tile size chosen for the parallel code; falls back to the default tile size
+    tile_size = parse_whole_number(data.get('tile_size'), 'tile_size', MAX_TILE_SIZE) or TILE_SIZE
+
+    P_Code = '#include<omp.h>\n' +'const int tile_size={};\n'.format(tile_size)+ P_Code
+    # optional CPU lists (e.g. "0-3") overriding where each analysis is pinned
+    host_cpus = set(available_cpus())
+    parallel_cpus = parse_cpu_list(data['parallel_cpus']) & host_cpus if data.get('parallel_cpus') else None
+    serial_cpus = parse_cpu_list(data['serial_cpus']) & host_cpus if data.get('serial_cpus') else None
+    # optional switch for the callgrind instruction-count pass (slow; timing is always native)
+    count_instructions = parse_flag(data.get('count_instructions'), 'count_instructions')
+    # optional fixed number of runs per input (at most ANALYSIS_MAX_RUNS); by default
+    # runs repeat until the timing is stable
+    num_runs = parse_whole_number(data.get('num_runs'), 'num_runs', ANALYSIS_MAX_RUNS)
+    # results are memoized per input file; force_rerun measures everything again
+    force_rerun = bool(parse_flag(data.get('force_rerun'), 'force_rerun'))
+
+    def prefixed(label):
+        if progress is None:
+            return None
+        return lambda step, status, result=None: progress(f"{label}/{step}", status, result)
+
+    # Both analyses run concurrently, each in its own workspace, and are merged below
+    print("Calling P Code and Serial code")
+    P_future = analysis_pool.submit(Calling_for_analysis, P_Code, 1, parallel_cpus, count_instructions, num_runs,
+                                    force_rerun, prefixed('parallel'))
+    S_future = analysis_pool.submit(Calling_for_analysis, S_Code, 0, serial_cpus, count_instructions, num_runs,
+                                    force_rerun, prefixed('serial'))
+    P_Analysis = P_future.result()
+    S_Analysis = S_future.result()
+
+    # Convert DataFrame to JSON-serializable format
+    if isinstance(P_Analysis, pd.DataFrame):
+        P_Analysis = insights_records(P_Analysis)
+    if isinstance(S_Analysis, pd.DataFrame):
+        S_Analysis = insights_records(S_Analysis)
+
+    return {'P_Analysis': P_Analysis, 'S_Analysis': S_Analysis}
+
 @app.route('/Analysis',methods=['POST'])
 def Analysis():
     try:
         data = request.get_json()
         data = data.get('body')
-        P_Code = data.get('P_Code')
-        S_Code = data.get('S_Code')
-
-        P_Code = '#include<omp.h>\n' +'const int tile_size={};\n'.format(TILE_SIZE)+ P_Code
-        print("Calling P Code ")
-        P_Analysis = Calling_for_analysis(P_Code, 1)
-        print("Calling Serial code")
-        S_Analysis = Calling_for_analysis(S_Code, 0)
-        
-
-        # Convert DataFrame to JSON-serializable format
-        if isinstance(P_Analysis, pd.DataFrame):
-            P_Analysis = P_Analysis.to_dict(orient='records')
-        if isinstance(S_Analysis, pd.DataFrame):
-            S_Analysis = S_Analysis.to_dict(orient='records')
+        invalid = invalid_analysis(data)
+        if invalid:
+            return invalid
+        with scheduler.admit('empirical'):
+            return jsonify(run_analysis(data)), 200
 
-        return jsonify({'P_Analysis': P_Analysis, 'S_Analysis': S_Analysis}), 200
-        
+    except QueueFull as e:
+        return queue_full_response(e)
     except Exception as e:
         print(f"Error in Analysis endpoint: {e}")
         import traceback
@@ -129,5 +334,75 @@ def Analysis():
             'S_Analysis': []
         }), 500
 
+# Job API: the same work as /upload and /Analysis, run in the background. Submitting
+# returns a job id; progress and partial results are read by polling /jobs/<id> or
+# streamed as Server-Sent Events from /jobs/<id>/events
+@app.route('/jobs/upload', methods=['POST'])
+def submit_upload_job():
+    data = request.get_json()
+    invalid = invalid_upload(data)
+    if invalid:
+        return invalid
+    job_id = submit_upload(data)
+    if not isinstance(job_id, str):
+        return job_id
+    return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+@app.route('/jobs/analysis', methods=['POST'])
+def submit_analysis_job():
+    data = (request.get_json() or {}).get('body')
+    invalid = invalid_analysis(data)
+    if invalid:
+        return invalid
+    try:
+        ticket = scheduler.admit('empirical')
+    except QueueFull as e:
+        return queue_full_response(e)
+    job = job_manager.submit('analysis', lambda job, data: run_admitted(ticket, run_analysis, data, progress=job.report), data)
+    return jsonify({'job_id': job.id, 'status': job.status}), 202
+
+# Cache sizes, line sizes and associativity of the backend host (read once at startup)
+@app.route('/hardware/cache', methods=['GET'])
+def hardware_cache():
+    return jsonify(host_cache_topology()), 200
+
+# Target hardware profiles /upload can optimize for
+@app.route('/hardware/profiles', methods=['GET'])
+def hardware_profiles():
+    return jsonify(load_profiles()), 200
+
+@app.route('/scheduler', methods=['GET'])
+def scheduler_status():
+    return jsonify(scheduler.status()), 200
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'message': 'Unknown job id', 'status': 'fail'}), 404
+    return jsonify(job.snapshot()), 200
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'message': 'Unknown job id', 'status': 'fail'}), 404
+
+    def stream():
+        version = None
+        while True:
+            if version is not None and not job.wait_for_change(version, timeout=15):
+                # keep idle connections from being closed by proxies
+                yield ": keep-alive\n\n"
+                continue
+            snapshot = job.snapshot()
+            version = snapshot['version']
+            yield f"data: {json.dumps(snapshot)}\n\n"
+            if snapshot['status'] in ('done', 'failed'):
+                break
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    # requests run in isolated workspaces, so they can be served concurrently
+    app.run(debug=True, threaded=True)
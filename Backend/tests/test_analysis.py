@@ -0,0 +1,34 @@
+"""
+Tests for the benchmark analysis (run from Backend/ with `python -m pytest tests`).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Analysis  # noqa: E402
+
+
+def test_result_records_keep_only_metrics_at_the_top_level(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cpp_file = tmp_path / "Code.cpp"
+    cpp_file.write_text("#include <iostream>\nint main() { int n; std::cin >> n; std::cout << n * 2; }\n")
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    (inputs / "1.txt").write_text("21\n")
+
+    df = Analysis.get_Insights(False, str(cpp_file), str(inputs), num_runs=2, workspace=str(tmp_path),
+                               measure_instructions=False, force_rerun=True)
+    records = Analysis.insights_records(df)
+
+    assert len(records) == 1
+    record = records[0]
+    assert not [key for key in record if key.endswith(("Median", "Stddev", "CI95 Low", "CI95 High"))]
+    assert "Runs" not in record
+    assert "Elapsed Time (s)" in record
+    statistics = record["Statistics"]
+    assert statistics["Runs"] == 2
+    elapsed = statistics["Elapsed Time (s)"]
+    assert set(elapsed) == {"median", "stddev", "ci_low", "ci_high"}
+    assert elapsed["ci_low"] <= record["Elapsed Time (s)"] <= elapsed["ci_high"]
@@ -0,0 +1,58 @@
+"""
+Tests for the baseline comparison of benchmarks/bench_parinomo.py (run from Backend/
+with `python -m pytest tests`). The timings themselves are machine specific and are
+not checked here.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(BACKEND_DIR, "benchmarks", "bench_parinomo.py")
+
+
+def run_bench(*args):
+    return subprocess.run([sys.executable, SCRIPT, "--sizes", "10", "--stages", "parinomo", "--repeats", "1", *args],
+                          cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300)
+
+
+def write_baseline(path, seconds):
+    path.write_text(json.dumps({"machine": "test", "results": {"10": {"parinomo": seconds}}}))
+
+
+def test_missing_baseline_fails_before_benchmarking(tmp_path):
+    result = run_bench("--baseline", str(tmp_path / "missing.json"))
+
+    assert result.returncode == 2
+    assert "⏱️" not in result.stdout
+
+
+def test_saved_baseline_records_every_size_and_stage(tmp_path):
+    baseline = tmp_path / "baseline.json"
+
+    result = run_bench("--save-baseline", "--baseline", str(baseline))
+
+    assert result.returncode == 0
+    assert json.loads(baseline.read_text())["results"]["10"]["parinomo"] > 0
+
+
+def test_compare_flags_stages_slower_than_the_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    write_baseline(baseline, 1e-6)
+
+    result = run_bench("--baseline", str(baseline))
+
+    assert result.returncode == 1
+    assert "parinomo on 10 loops" in result.stdout
+
+
+def test_compare_passes_within_the_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    write_baseline(baseline, 600.0)
+
+    result = run_bench("--baseline", str(baseline))
+
+    assert result.returncode == 0
+    assert "No stage slower than the baseline" in result.stdout
@@ -0,0 +1,64 @@
+"""
+Tests for the C++ lexer behind the loop analyses (run from Backend/ with `python -m pytest tests`).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cpp_lexer import loop_spans, tokenize  # noqa: E402
+
+
+def test_comments_are_skipped_and_literals_are_single_tokens():
+    source = ('int a; // for (int i = 0; i < n; i++) {}\n'
+              '/* for (;;) */ const char *s = "for (;;) {\\"";\n'
+              'auto r = R"x(for (;;) { )" )x"; char c = \'{\';\n')
+
+    tokens = [(token.kind, token.text) for token in tokenize(source)]
+
+    assert ("identifier", "for") not in tokens
+    assert ("string", '"for (;;) {\\""') in tokens
+    assert ("string", 'R"x(for (;;) { )" )x"') in tokens
+    assert ("char", "'{'") in tokens
+    assert loop_spans(source) == []
+
+
+def test_token_offsets_point_into_the_source():
+    source = "x += y[1]; // done"
+
+    for token in tokenize(source):
+        assert source[token.start:token.end] == token.text
+    assert [token.text for token in tokenize(source)] == ["x", "+=", "y", "[", "1", "]", ";"]
+
+
+def test_range_for_is_not_a_loop_but_loops_in_its_body_are():
+    source = "for (auto x : v) { for (int i = 0; i < n; i++) a[i] = x; }"
+
+    spans = loop_spans(source)
+
+    assert [source[start:end] for start, end in spans] == ["for (int i = 0; i < n; i++) a[i] = x;"]
+    assert loop_spans(source, any_loop=True) == [(0, len(source))]
+
+
+def test_brace_less_bodies_end_with_their_statement():
+    source = ("for (int j = 0; j < m; j++)\n"
+              "  if (b[j]) c++;\n"
+              "  else d++;\n"
+              "int z;\n")
+
+    [(start, end)] = loop_spans(source)
+
+    assert source[start:end] == "for (int j = 0; j < m; j++)\n  if (b[j]) c++;\n  else d++;"
+
+
+def test_nested_loops_belong_to_their_outermost_loop():
+    source = ("for (int i = 0; i < n; i++) {\n"
+              "  for (int j = 0; j < (m); j++) {\n"
+              "    s += \"}\"[0] + a[i][j];\n"
+              "  }\n"
+              "}\n"
+              "while (k) { k--; }\n")
+
+    assert [source[start:end] for start, end in loop_spans(source)] == [source[:source.index("\nwhile")]]
+    assert len(loop_spans(source, any_loop=True)) == 2
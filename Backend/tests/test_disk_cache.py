@@ -0,0 +1,30 @@
+"""
+Tests of the on-disk caches (run from Backend/ with `python -m pytest tests`).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from disk_cache import EVICTION_LOW_WATER, DiskCache  # noqa: E402
+
+
+def test_eviction_keeps_the_cache_within_its_limit(tmp_path):
+    cache = DiskCache(str(tmp_path), max_entries=50)
+    for index in range(500):
+        cache.set(str(index), index)
+
+    entries = [name for name in os.listdir(tmp_path) if name.endswith(".json")]
+    assert int(50 * EVICTION_LOW_WATER) <= len(entries) <= 50
+    assert cache.get("499") == 499
+
+
+def test_rewriting_a_key_does_not_grow_the_count(tmp_path):
+    cache = DiskCache(str(tmp_path), max_entries=10)
+    for _ in range(20):
+        cache.set("same", 1)
+        cache.set("other", 2)
+
+    assert len(os.listdir(tmp_path)) == 2
+    assert cache.get("same") == 1
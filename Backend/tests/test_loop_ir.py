@@ -0,0 +1,89 @@
+"""
+Tests for the shared loop IR (run from Backend/ with `python -m pytest tests`).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loop_ir import LoopIR  # noqa: E402
+
+NESTED = ("for (int i = 0; i < n; i += 2) {\n"
+          "  for (int j = i + 1; j <= m; j++) {\n"
+          "    c[i][j + 1] = a[i * 2][j] + t;\n"
+          "    t = c[i][j];\n"
+          "  }\n"
+          "  u = s;\n"
+          "}")
+
+
+def test_header_fields_and_nested_headers():
+    ir = LoopIR(NESTED)
+
+    header = ir.header
+    assert (header.var, header.var_type, header.start, header.comparator, header.end, header.step) == \
+        ("i", "int", "0", "<", "n", "i += 2")
+    assert NESTED[:header.text_end] == "for (int i = 0; i < n; i += 2)"
+    [child] = ir.children
+    assert (child.header.var, child.header.start, child.header.comparator, child.header.end) == ("j", "i + 1", "<=", "m")
+    assert ir.depth == 2
+    assert ir.loop_variables == ["i", "j"]
+    assert ir.declarations == ["i", "j"]
+
+
+def test_array_refs_keep_index_expressions_write_flag_and_line():
+    ir = LoopIR(NESTED)
+
+    refs = [(ref.name, ref.indices, ref.write, ref.line) for ref in ir.array_refs]
+    assert refs == [
+        ("c", ("i", "j + 1"), True, 3),
+        ("a", ("i * 2", "j"), False, 3),
+        ("c", ("i", "j"), False, 4),
+    ]
+    assert ir.arrays == ["c", "a"]
+    assert ir.dimensions == 2
+
+
+def test_scalar_first_read_and_write_order():
+    ir = LoopIR(NESTED)
+
+    # t is read on line 3 before line 4 assigns it; u is only written, s only read
+    assert ir.scalar_reads["t"] < ir.scalar_writes["t"]
+    assert "u" not in ir.scalar_reads and "s" not in ir.scalar_writes
+    assert ir.scalars == ["i", "n", "j", "m", "t", "s", "u"]
+
+
+def test_assignments_write_after_evaluating_their_value():
+    written_first = LoopIR("for (int i = 0; i < n; i++) { t = a[i]; b[i] = t; }")
+    read_first = LoopIR("for (int i = 0; i < n; i++) { x = g(x); b[i] = x; }")
+
+    assert written_first.scalar_writes["t"] < written_first.scalar_reads["t"]
+    assert read_first.scalar_reads["x"] < read_first.scalar_writes["x"]
+    assert read_first.calls == {"g"}
+
+
+def test_brace_less_body_and_comments_and_strings():
+    ir = LoopIR('for (int i = 0; i < n; i++)\n'
+                '  // a[i] = 0;\n'
+                '  if (v[i] > 0) printf("%d[x] = y\\n", v[i]);')
+
+    assert [(ref.name, ref.indices, ref.line) for ref in ir.array_refs] == [("v", ("i",), 3), ("v", ("i",), 3)]
+    assert ir.has_io
+    assert ir.scalar_writes.keys() == {"i"}
+
+
+def test_reductions_record_their_operator():
+    reductions = LoopIR("for (int i = 0; i < n; i++) {\n"
+                        "  s += a[i];\n"
+                        "  p = p * a[i];\n"
+                        "  m = std::max(m, a[i]);\n"
+                        "  if (a[i] > 0) count++;\n"
+                        "  q = q * a[i] + 1;\n"
+                        "  r += a[i];\n"
+                        "  b[i] = r;\n"
+                        "  int t = 0;\n"
+                        "  t += a[i];\n"
+                        "}").reductions
+
+    assert reductions == {"s": "+", "p": "*", "m": "max", "count": "+"}
@@ -0,0 +1,84 @@
+"""
+Regression tests for the Parinomo pipeline (run from Backend/ with `python -m pytest tests`).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Parinomo  # noqa: E402
+
+
+def test_early_exit_nested_loop_is_parallelized_without_tiling(tmp_path, monkeypatch):
+    # Parinomo writes P_code.txt to the working directory
+    monkeypatch.chdir(tmp_path)
+    code = ("void f(int **a, int n, int m) {\n"
+            "    for (int i = 0; i < n; i++) {\n"
+            "        for (int j = 0; j < m; j++) {\n"
+            "            if (a[i][j] == 5) {\n"
+            "                break;\n"
+            "            }\n"
+            "        }\n"
+            "    }\n"
+            "}\n")
+
+    result = Parinomo.Parinomo(code, "host", "8GB", 4, analysis_level="static")
+
+    assert len(result) == 1
+    assert "#pragma omp parallel for" in result[1]["Parallelized_Loop"]
+    assert "Tiled_Loop" not in result[1]
+
+
+def test_soft_break_handles_literal_loop_bounds():
+    loop = ("for (int i = 0; i < 512; i++) {\n"
+            "    for (int j = 0; j < 64; j++) {\n"
+            "        if (a[i][j] == key) {\n"
+            "            found = j;\n"
+            "            break;\n"
+            "        }\n"
+            "    }\n"
+            "}")
+
+    converted = Parinomo.Soft_Break(loop)
+
+    assert "j = 64;" in converted
+    assert "break" not in converted
+
+
+def test_static_tile_size_stays_in_the_empirical_search_window():
+    profile = {"name": "small", "caches": {"L1": 32 * 1024, "L2": 256 * 1024, "L3": 8 * 1024**2}}
+    for array_type in ("1D array", "2D array", "3D array"):
+        low, high = Parinomo.analytical_tile_bounds(8, array_type, hierarchy=profile["caches"])
+
+        result = Parinomo.tile_loop("for (int i = 0; i < n; i++) {\n    c[i] = a[i] + b[i];\n}", array_type, 2,
+                                    indent=False, analysis_level="static", profile=profile)
+
+        assert result["Tile_Optimization_Status"] == "Analytical"
+        assert low <= result["Optimal_Tile_Size"] <= high
+
+
+def test_reductions_get_one_clause_with_their_own_operator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    code = ("double f(double *a, int n) {\n"
+            "    double s = 0, p = 1;\n"
+            "    for (int i = 0; i < n; i++) {\n"
+            "        s += a[i];\n"
+            "        p = p * a[i];\n"
+            "    }\n"
+            "    return s + p;\n"
+            "}\n")
+
+    pragma = Parinomo.Parinomo(code, "host", "8GB", 4, analysis_level="static")[1]["Parallelized_Loop"]
+
+    assert "reduction(+ : s)" in pragma
+    assert "reduction(* : p)" in pragma
+    assert pragma.count("reduction") == 2
+
+
+def test_load_balancing_joins_wrapped_pragmas():
+    loop = "#pragma omp parallel for shared(a) \\\n    reduction(+ : s)\nfor (int i = 0; i < n; i++) {\n}"
+
+    balanced = Parinomo.implement_loop_balancing(loop, 4, "dynamic")
+
+    assert balanced.startswith("#pragma omp parallel for shared(a) reduction(+ : s) schedule(dynamic) num_threads(4)\nfor")
@@ -0,0 +1,196 @@
+"""
+Helpers describing the build toolchain and host the backend runs on.
+
+These values are folded into cache keys so cached measurements or builds are
+never reused across a compiler upgrade or a different machine.
+
+compile_command also accelerates the builds themselves: the system headers a
+source file starts with are compiled once into a precompiled header (per
+include list, compiler and flags) that is force-included ahead of the file,
+and compiles go through ccache when SPECBOT_CCACHE_DIR is set.
+"""
+
+import functools
+import os
+import platform
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from cpu_affinity import pinned_command
+from disk_cache import make_key
+
+# Precompiled headers for the leading system includes of harnesses and analysed code
+PCH_DIR = os.environ.get("SPECBOT_PCH_DIR", "Cache/pch")
+USE_PCH = os.environ.get("SPECBOT_PCH", "1").lower() not in ("0", "false", "no", "off")
+# Compilation cache directory; compiles are run through ccache when set and ccache is installed
+CCACHE_DIR = os.environ.get("SPECBOT_CCACHE_DIR")
+
+_SYSTEM_INCLUDE = re.compile(r"#\s*include\s*<([^<>\s]+)>\s*(?://.*)?$")
+_pch_locks = {}
+_pch_locks_lock = threading.Lock()
+_pch_failed = set()
+
+
+@functools.lru_cache(maxsize=None)
+def tool_version(tool):
+    """
+    Return the first line of `<tool> --version`, or "unknown".
+
+    Args:
+        tool (str): Executable name, e.g. "g++" or "valgrind".
+
+    Returns:
+        str: Version string.
+    """
+    try:
+        result = subprocess.run([tool, "--version"], capture_output=True, text=True, timeout=10)
+        lines = result.stdout.strip().splitlines()
+        return lines[0] if lines else "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def compiler_version(compiler="g++"):
+    """
+    Return the version string of compiler (see tool_version).
+    """
+    return tool_version(compiler)
+
+
+@functools.lru_cache(maxsize=None)
+def cpu_signature():
+    """
+    Return a string identifying the host CPU model and core count.
+
+    Returns:
+        str: CPU signature such as "x86_64|Intel(R) Xeon(R) ...|8".
+    """
+    model = platform.processor() or "unknown"
+    try:
+        with open("/proc/cpuinfo", "r") as file:
+            for line in file:
+                if line.startswith("model name"):
+                    model = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+
+    return f"{platform.machine()}|{model}|{os.cpu_count()}"
+
+
+def leading_system_includes(source):
+    """
+    Return the system headers included before the first other line of source.
+
+    Only this leading block is precompiled: force-including it ahead of the
+    file processes exactly the headers the file starts with, in the same
+    order, so the meaning of the program is unchanged.
+
+    Returns:
+        tuple: Header names, e.g. ("iostream", "vector").
+    """
+    includes = []
+    for line in source.splitlines():
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+        match = _SYSTEM_INCLUDE.match(line)
+        if not match:
+            break
+        includes.append(match.group(1))
+    return tuple(includes)
+
+
+def _pch_lock(key):
+    with _pch_locks_lock:
+        return _pch_locks.setdefault(key, threading.Lock())
+
+
+def precompiled_header(includes, flags, compiler="g++", cpus=None):
+    """
+    Build (once) and return a precompiled header for a list of system includes.
+
+    The header is built with the same compiler and flags as the code that uses
+    it, since g++ ignores a precompiled header built with different options.
+
+    Args:
+        includes (tuple): System header names, see leading_system_includes.
+        flags (list): Compile flags of the code that will include it.
+        compiler (str): Compiler executable.
+        cpus (iterable): CPUs the header compile is pinned to (default: unpinned).
+
+    Returns:
+        str: Absolute path of the header to pass to -include, or None if
+        there is nothing to precompile or the build failed.
+    """
+    if not includes:
+        return None
+    key = make_key("pch", compiler_version(compiler), " ".join(flags), *includes)
+    directory = os.path.abspath(os.path.join(PCH_DIR, key))
+    header = os.path.join(directory, "prologue.h")
+    if os.path.exists(header + ".gch"):
+        return header
+    if key in _pch_failed:
+        return None
+
+    with _pch_lock(key):
+        if os.path.exists(header + ".gch"):
+            return header
+        temporary = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(header, "w") as file:
+                file.write("".join(f"#include <{include}>\n" for include in includes))
+            fd, temporary = tempfile.mkstemp(suffix=".gch.tmp", dir=directory)
+            os.close(fd)
+            result = subprocess.run(
+                pinned_command([compiler, *flags, "-x", "c++-header", header, "-o", temporary], cpus),
+                capture_output=True, text=True, timeout=120
+            )
+            if result.returncode != 0:
+                print(f"Warning: Could not precompile {', '.join(includes)}: {result.stderr.strip()}")
+                _pch_failed.add(key)
+                return None
+            os.replace(temporary, header + ".gch")
+            temporary = None
+            return header
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Warning: Could not precompile {', '.join(includes)}: {e}")
+            _pch_failed.add(key)
+            return None
+        finally:
+            if temporary and os.path.exists(temporary):
+                os.unlink(temporary)
+
+
+def compile_command(source_path, output, flags, source=None, compiler="g++", cpus=None):
+    """
+    Build the command line (and environment) for compiling one source file.
+
+    Args:
+        source_path (str): File to compile.
+        output (str): Executable to produce.
+        flags (list): Compile flags.
+        source (str): Content of source_path; enables the precompiled header.
+        compiler (str): Compiler executable.
+        cpus (iterable): CPUs the compile is pinned to (default: unpinned).
+
+    Returns:
+        tuple: (command, env) for subprocess.run; env is None unless ccache is used.
+    """
+    command = [compiler, *flags]
+    header = precompiled_header(leading_system_includes(source), flags, compiler, cpus) if USE_PCH and source else None
+    if header:
+        command += ["-include", header]
+    command += [source_path, "-o", output]
+
+    env = None
+    if CCACHE_DIR and shutil.which("ccache"):
+        command = ["ccache", *command]
+        # Precompiled headers are only cacheable with these sloppiness settings
+        env = dict(os.environ, CCACHE_DIR=os.path.abspath(CCACHE_DIR),
+                   CCACHE_SLOPPINESS="pch_defines,time_macros,include_file_mtime,include_file_ctime")
+    return pinned_command(command, cpus), env
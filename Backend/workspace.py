@@ -0,0 +1,34 @@
+"""
+Per-request work directories for the Specbot backend.
+
+Every analysis writes its source files, executables and result CSVs into its own
+temporary directory, so concurrent requests never clobber each other's
+artifacts and cleanup only touches the request's own files.
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+# Parent directory of all request workspaces
+WORKSPACE_ROOT = os.environ.get("SPECBOT_WORKSPACE_ROOT", os.path.join(tempfile.gettempdir(), "specbot"))
+
+
+@contextmanager
+def request_workspace(prefix="request-"):
+    """
+    Create an isolated work directory for one request and remove it afterwards.
+
+    Args:
+        prefix (str): Prefix of the directory name, useful when debugging.
+
+    Yields:
+        str: Absolute path of the work directory.
+    """
+    os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+    path = os.path.abspath(tempfile.mkdtemp(prefix=prefix, dir=WORKSPACE_ROOT))
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
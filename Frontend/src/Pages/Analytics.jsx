@@ -17,6 +17,9 @@ import {
 } from "chart.js";
 import { Line, Bar, Pie, Doughnut } from "react-chartjs-2";
 
+// Record keys that are not metrics: the file name and the nested run statistics
+const NON_METRIC_KEYS = ["Input File", "Statistics"];
+
 // Register ChartJS components
 ChartJS.register(
   CategoryScale,
@@ -101,7 +104,7 @@ const Analytics = () => {
         if (response.data && response.data.S_Analysis.length > 0) {
           const metrics = Object.keys(response.data.S_Analysis[0]);
           const firstNonInputMetric = metrics.find(
-            (metric) => metric !== "Input File"
+            (metric) => !NON_METRIC_KEYS.includes(metric)
           );
           setSelectedMetric(firstNonInputMetric || metrics[0]);
         }
@@ -364,13 +367,15 @@ const Analytics = () => {
             </tr>
           </thead>
           <tbody>
-            {Object.keys(serialData).map((key) => (
-              <tr key={key}>
-                <td>{key}</td>
-                <td>{serialData[key]}</td>
-                <td>{parallelData[key]}</td>
-              </tr>
-            ))}
+            {Object.keys(serialData)
+              .filter((key) => key !== "Statistics")
+              .map((key) => (
+                <tr key={key}>
+                  <td>{key}</td>
+                  <td>{serialData[key]}</td>
+                  <td>{parallelData[key]}</td>
+                </tr>
+              ))}
           </tbody>
         </table>
       </div>
@@ -382,7 +387,7 @@ const Analytics = () => {
     if (!data || !data.S_Analysis || !data.P_Analysis) return null;
 
     const metrics = Object.keys(data.S_Analysis[0]).filter(
-      (key) => key !== "Input File"
+      (key) => !NON_METRIC_KEYS.includes(key)
     );
 
     // Create combined data for sorting (same logic as chart)
@@ -486,7 +491,7 @@ const Analytics = () => {
     if (!data || !data.S_Analysis || data.S_Analysis.length === 0) return [];
 
     return Object.keys(data.S_Analysis[0]).filter(
-      (metric) => metric !== "Input File"
+      (metric) => !NON_METRIC_KEYS.includes(metric)
     );
   };
 